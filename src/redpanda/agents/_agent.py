@@ -12,26 +12,43 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
+import inspect
 import json
-from contextlib import AsyncExitStack
-from typing import Any, override
-
-from litellm import (
-    CustomStreamWrapper,
-    acompletion,  # pyright: ignore[reportUnknownVariableType]
-)
-from litellm.types.utils import (  # pyright: ignore[reportMissingTypeStubs]
-    ChatCompletionMessageToolCall,
-    Message,
-    StreamingChoices,
-    Usage,
-)
+import logging
+from collections import Counter, OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any, override
+
+import orjson
 from opentelemetry import trace
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
-from ._mcp import MCPClient, MCPEndpoint, mcp_client
+from ._mcp import MCPClientGroup, MCPEndpoint
 from ._tools import Tool, ToolResponse
 
+_logger = logging.getLogger(__name__)
+
+# litellm takes seconds to import, so it is only imported once a model is first invoked.
+if TYPE_CHECKING:
+    from litellm import CustomStreamWrapper
+    from litellm.types.utils import (  # pyright: ignore[reportMissingTypeStubs]
+        ChatCompletionMessageToolCall,
+        Message,
+        ModelResponse,
+    )
+
+
+async def acompletion(**kwargs: Any) -> ModelResponse | CustomStreamWrapper:
+    import litellm
+
+    return await litellm.acompletion(**kwargs)  # pyright: ignore[reportUnknownMemberType]
+
 
 class AgentHooks:
     """
@@ -40,14 +57,14 @@ class AgentHooks:
 
     async def on_start(
         self,
-        agent: "Agent",
+        agent: Agent,
     ) -> None:
         """Called before the agent is invoked."""
         _ = agent
 
     async def on_end(
         self,
-        agent: "Agent",
+        agent: Agent,
         output: Any,
     ) -> None:
         """Called when the agent produces a final output."""
@@ -55,7 +72,7 @@ class AgentHooks:
 
     async def on_tool_start(
         self,
-        agent: "Agent",
+        agent: Agent,
         tool: Tool,
         args: str,
     ) -> None:
@@ -64,7 +81,7 @@ class AgentHooks:
 
     async def on_tool_end(
         self,
-        agent: "Agent",
+        agent: Agent,
         tool: Tool,
         result: str,
     ) -> None:
@@ -94,6 +111,22 @@ class Agent:
         tools: The tools exposed to the agent.
         mcp: The MCP endpoints that the agent can invoke.
         hooks: Callbacks to invoke during various points of the agent runtime.
+        cache_control: An optional prompt caching hint attached to the system prompt, which
+            marks the end of the prompt prefix (tools and system prompt) that the provider
+            should cache. Only some providers support this.
+            Examples:
+                {"type": "ephemeral"}
+        response_cache_size: The maximum number of model responses kept in memory and reused
+            when the exact same request is made to the model again. Disabled when 0.
+        max_turns: The maximum number of times the model is invoked in a single run.
+        max_tool_repeats: The maximum number of times the model can call the same tool with
+            the same arguments in a single run.
+        history_limit: The maximum number of messages kept in the conversation before the
+            older messages are replaced by a summary. Unlimited when None.
+        summary_model: The LLM model used to summarize the conversation history, defaults
+            to the agent's model.
+        draft_model: A faster LLM model raced against the agent's model when no tools are
+            available, the first model to produce a token answers.
     """
 
     name: str
@@ -104,6 +137,28 @@ class Agent:
     tools: list[Tool]
     mcp: list[MCPEndpoint]
     hooks: AgentHooks
+    cache_control: dict[str, Any] | None
+    response_cache_size: int
+    max_turns: int
+    max_tool_repeats: int
+    history_limit: int | None
+    summary_model: str | None
+    draft_model: str | None
+
+    _response_source: type[BaseModel] | None
+    _response_adapter: TypeAdapter[BaseModel] | None
+    _response_schema: dict[str, Any] | None
+    _response_cache: OrderedDict[str, ModelResponse]
+    _system_source: tuple[str | None, dict[str, Any] | None] | None
+    _system_message: dict[str, Any] | None
+    _system_bytes: bytes
+    _mcp_lock: asyncio.Lock
+    _mcp_pool: MCPClientGroup | None
+    _tools_source: tuple[list[Tool], list[MCPEndpoint]] | None
+    _tools_cache: dict[str, Tool] | None
+    _tool_defs_cache: list[dict[str, Any]] | None
+    _tool_defs_bytes: bytes | None
+    _tool_conflicts: set[tuple[str, str]]
 
     def __init__(
         self,
@@ -114,6 +169,13 @@ class Agent:
         tools: list[Tool] | None = None,
         mcp: list[MCPEndpoint] | None = None,
         hooks: AgentHooks | None = None,
+        cache_control: dict[str, Any] | None = None,
+        response_cache_size: int = 0,
+        max_turns: int = 16,
+        max_tool_repeats: int = 3,
+        history_limit: int | None = None,
+        summary_model: str | None = None,
+        draft_model: str | None = None,
         **kwargs: Any,
     ):
         """
@@ -131,6 +193,32 @@ class Agent:
             tools: The tools exposed to the agent.
             mcp: The MCP endpoints that the agent can invoke.
             hooks: Callbacks to invoke during various points of the agent runtime.
+            cache_control: An optional prompt caching hint attached to the system prompt, which
+                marks the end of the prompt prefix (tools and system prompt) that the provider
+                should cache. Only some providers support this.
+                Examples:
+                    {"type": "ephemeral"}
+            response_cache_size: The maximum number of model responses kept in memory and
+                reused when the exact same request (model, messages, tools, parameters and
+                response type) is made to the model again. Only enable this for agents where
+                repeating the previous answer to the same prompt is acceptable. Disabled when 0.
+            max_turns: The maximum number of times the model is invoked in a single run, after
+                which the run fails.
+            max_tool_repeats: The maximum number of times the model can call the same tool
+                with the same arguments in a single run, after which the run fails as the model
+                is likely stuck in a loop.
+            history_limit: The maximum number of messages (excluding the system prompt) kept
+                in the conversation. When exceeded, the older half of the conversation is
+                replaced by a summary. Unlimited when None.
+            summary_model: The LLM model used to summarize the conversation history, this can
+                be a cheaper model than the agent's. Defaults to the agent's model, in which case
+                the agent's model parameters are used for the summary too.
+            draft_model: A faster LLM model that is invoked in parallel with the agent's model
+                when the agent has no tools. Whichever model produces the first token answers
+                and the other request is cancelled. This lowers the time to the first token at
+                the cost of paying for both requests and of answers that may come from the
+                draft model, so only use a draft model whose answers are acceptable. The agent's
+                model parameters are not used for the draft model.
             **kwargs: A dictionary of parameters that the model will use.
                 These parameters are specific to the model.
                 Examples:
@@ -146,82 +234,311 @@ class Agent:
         self.tools = tools or []
         self.mcp = mcp or []
         self.hooks = hooks or AgentHooks()
+        self.cache_control = cache_control
+        self.response_cache_size = response_cache_size
+        self.max_turns = max_turns
+        self.max_tool_repeats = max_tool_repeats
+        self.history_limit = history_limit
+        self.summary_model = summary_model
+        self.draft_model = draft_model
+        self._response_cache = OrderedDict()
+        self._response_source = None
+        self._response_adapter = None
+        self._response_schema = None
+        self._system_source = None
+        self._update_prompt()
+        self._mcp_lock = asyncio.Lock()
+        self._mcp_pool = None
+        self._tools_source = None
+        self._tools_cache = None
+        self._tool_defs_cache = None
+        self._tool_defs_bytes = None
+        # Conflicts that were already logged, transient endpoints are merged again on each run.
+        self._tool_conflicts = set()
+
+    def _update_prompt(self) -> None:
+        """
+        Rebuild what is derived from the instructions and response format when they changed.
+        """
+        if self.response_format is not self._response_source:
+            # The model's validator is compiled once and reused for every run.
+            self._response_source = self.response_format
+            self._response_adapter = None
+            self._response_schema = None
+            if self.response_format is not None:
+                self._response_adapter = TypeAdapter(self.response_format)
+                self._response_schema = self._response_adapter.json_schema()
+        source = (self.instructions, self.cache_control)
+        if source != self._system_source:
+            # Built once and shared between runs (never mutated) so that the prompt prefix sent
+            # to the model stays identical and can be cached by the provider.
+            self._system_source = source
+            self._system_message = None
+            if self.instructions:
+                content: str | list[dict[str, Any]] = self.instructions
+                if self.cache_control is not None:
+                    content = [
+                        {
+                            "type": "text",
+                            "text": self.instructions,
+                            "cache_control": self.cache_control,
+                        }
+                    ]
+                self._system_message = {"role": "system", "content": content}
+            self._system_bytes = orjson.dumps(self._system_message, option=orjson.OPT_SORT_KEYS)
+
+    async def __aenter__(self) -> Agent:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the connections to MCP servers that the agent keeps open between runs.
+
+        The agent can still be used afterwards, the connections are reopened on the next run.
+        """
+        async with self._mcp_lock:
+            pool = self._mcp_pool
+            self._mcp_pool = None
+            self._tools_cache = None
+            self._tool_defs_cache = None
+            self._tool_defs_bytes = None
+            if pool is not None:
+                await pool.aclose()
+
+    async def _ensure_mcp_ready(self) -> tuple[dict[str, Tool], list[dict[str, Any]]]:
+        """
+        Connect to the persistent MCP endpoints on first use and return all the agent's tools
+        along with their definitions for the model.
+
+        The tools and endpoints are connected to again when `tools` or `mcp` changed.
+        """
+        tools, tool_defs = self._tools_cache, self._tool_defs_cache
+        if tools is not None and tool_defs is not None and self._tools_current():
+            if not (self._mcp_pool and self._mcp_pool.lost):
+                return tools, tool_defs
+        async with self._mcp_lock:
+            if self._mcp_pool is not None and (self._mcp_pool.lost or not self._tools_current()):
+                # The connections were lost or are outdated, clean up and reconnect below.
+                await self._mcp_pool.aclose()
+                self._mcp_pool = None
+                self._tools_cache = None
+                self._tool_defs_cache = None
+                self._tool_defs_bytes = None
+            if self._tools_cache is not None and self._tool_defs_cache is not None:
+                return self._tools_cache, self._tool_defs_cache
+            sources = (list(self.tools), list(self.mcp))
+            servers = [server for server in self.mcp if server._persistent]  # pyright: ignore[reportPrivateUsage]
+            # The connections are shared by all later runs, so they must not hold on to the
+            # context (such as the current span) of the run that happened to open them.
+            pool = await MCPClientGroup.open(servers, context=contextvars.Context())
+            tools = {tool.name: tool for tool in self.tools}
+            try:
+                client_tools = await asyncio.gather(*(c.list_tools() for c in pool.clients))
+            except BaseException:
+                await pool.aclose()
+                raise
+            _merge_tools(tools, zip(servers, client_tools, strict=True), self._tool_conflicts)
+            tool_defs = _tool_defs(tools)
+            self._mcp_pool = pool
+            self._tools_source = sources
+            self._tools_cache = tools
+            self._tool_defs_cache = tool_defs
+            self._tool_defs_bytes = orjson.dumps(tool_defs, option=orjson.OPT_SORT_KEYS)
+            return tools, tool_defs
+
+    def _tools_current(self) -> bool:
+        """
+        Whether the cached tools were built from the current `tools` and `mcp`.
+        """
+        source = self._tools_source
+        return source is not None and source[0] == self.tools and source[1] == self.mcp
 
-    async def run(self, input: str) -> Any:
+    async def run(self, input: str | Any) -> Any:
         """
-        Generate a response from the model given an input text.
+        Generate a response from the model given an input text or structured data.
+
+        Connections to MCP servers are opened on the first run and kept open for subsequent
+        runs (until `tools` or `mcp` change), use `aclose` (or use the agent as an async context
+        manager) to close them.
 
         Args:
-            input: The input text that the model will use to generate a response.
+            input: The input text that the model will use to generate a response, bytes are
+                decoded as UTF-8 text. Any other value (such as a dict, list or Pydantic model)
+                is given to the model as JSON.
         Returns:
             The generated response from the model.
         """
-        await self.hooks.on_start(self)
-        async with AsyncExitStack() as stack:
-            mcp_clients: list[MCPClient] = []
-            for server in self.mcp:
-                mcp_clients.append(await stack.enter_async_context(mcp_client(server)))
+        return await self._run(input, None)
 
-            tools = {tool.name: tool for tool in self.tools}
+    async def run_stream(self, input: str | Any) -> AsyncIterator[str]:
+        """
+        Generate a response from the model given an input text, streaming the text as it is
+        generated by the model.
 
-            for client in mcp_clients:
-                await client.initialize()
-                for tool in await client.list_tools():
-                    if tool.name not in tools:
-                        tools[tool.name] = tool
-                    else:
-                        # TODO: Warn on conflicting tools?
-                        pass
-
-            tool_defs = [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "parameters": tool.parameters,
-                    },
-                }
-                for tool in tools.values()
-            ]
-            messages: list[dict[str, str] | Message] = [{"role": "user", "content": input}]
-            if self.instructions:
-                messages = [{"role": "system", "content": self.instructions}] + messages
-            while True:
-                model_resp = await self._invoke_llm(messages, tool_defs)
+        The text of all the model's responses is streamed, including any text the model
+        produces alongside tool calls. When the agent has a response type the streamed text
+        is the JSON of the response, and the validated response is passed to `on_end`.
+
+        Args:
+            input: The input text that the model will use to generate a response, bytes are
+                decoded as UTF-8 text. Any other value (such as a dict, list or Pydantic model)
+                is given to the model as JSON.
+        Returns:
+            An iterator over the chunks of text generated by the model.
+        """
+        queue: asyncio.Queue[str | None] = asyncio.Queue()
+        task = asyncio.create_task(self._run(input, queue.put_nowait))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (token := await queue.get()) is not None:
+                yield token
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+
+    async def _run(self, input: str | Any, on_token: Callable[[str], None] | None) -> Any:
+        await self.hooks.on_start(self)
+        self._update_prompt()
+        tools, tool_defs = await self._ensure_mcp_ready()
+        transient = [server for server in self.mcp if not server._persistent]  # pyright: ignore[reportPrivateUsage]
+        async with await MCPClientGroup.open(transient) as transient_clients:
+            if transient_clients.clients:
+                tools = dict(tools)
+                client_tools = await asyncio.gather(
+                    *(c.list_tools() for c in transient_clients.clients)
+                )
+                _merge_tools(tools, zip(transient, client_tools, strict=True), self._tool_conflicts)
+                tool_defs = _tool_defs(tools)
+            if isinstance(input, bytes):
+                input = input.decode("utf-8")
+            elif not isinstance(input, str):
+                input = orjson.dumps(input, default=_model_dump).decode()
+            messages: list[dict[str, Any] | Message] = [{"role": "user", "content": input}]
+            if self._system_message is not None:
+                messages.insert(0, self._system_message)
+            from litellm.types.utils import StreamingChoices  # pyright: ignore[reportMissingTypeStubs]
+
+            tool_repeats: Counter[tuple[str | None, str]] = Counter()
+            for _ in range(self.max_turns):
+                if self.history_limit is not None:
+                    messages = await self._compact_history(messages, self.history_limit)
+                model_resp = await self._invoke_llm(messages, tool_defs, on_token)
                 choice_resp = model_resp.choices[-1]
                 if isinstance(choice_resp, StreamingChoices):
                     raise Exception("unexpected streaming response type")
                 if choice_resp.message.tool_calls:
+                    for tool_call in choice_resp.message.tool_calls:
+                        key = (tool_call.function.name, tool_call.function.arguments)
+                        tool_repeats[key] += 1
+                        if tool_repeats[key] > self.max_tool_repeats:
+                            raise Exception(
+                                f"tool {key[0]} called more than {self.max_tool_repeats} times "
+                                + "with the same arguments"
+                            )
                     messages.append(choice_resp.message)
                     messages.extend(await self._call_tools(choice_resp.message.tool_calls, tools))
                     continue
                 output = choice_resp.message.content
                 if output is None:
                     raise Exception("unexpected response type of None")
-                if self.response_format is not None:
-                    output = self.response_format.model_validate_json(output)
+                if self._response_adapter is not None:
+                    output = self._response_adapter.validate_json(output)
                 await self.hooks.on_end(self, output)
                 return output
+            raise Exception(f"agent {self.name} exceeded the maximum of {self.max_turns} turns")
+
+    async def _compact_history(
+        self, messages: list[dict[str, Any] | Message], limit: int
+    ) -> list[dict[str, Any] | Message]:
+        """
+        Replace the older half of the conversation with a summary once it exceeds `limit`.
+        """
+        from litellm import CustomStreamWrapper
+        from litellm.types.utils import StreamingChoices  # pyright: ignore[reportMissingTypeStubs]
+
+        prefix = messages[:1] if messages[0] is self._system_message else []
+        conversation = messages[len(prefix) :]
+        if len(conversation) <= limit:
+            return messages
+        split = len(conversation) - limit // 2
+        # Tool results must directly follow the assistant message that requested them, so
+        # they are summarized along with it.
+        while split < len(conversation) and _role(conversation[split]) == "tool":
+            split += 1
+        # The agent's parameters (such as its API key or base) are meant for the agent's model.
+        parameters = self.parameters if self.summary_model is None else {}
+        with trace.get_tracer("redpanda.agent").start_as_current_span("summarize_history"):
+            resp = await acompletion(
+                model=self.summary_model or self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "Summarize the following conversation between a user and an "
+                        + "AI agent, including the results of any tools the agent called. "
+                        + "Keep all details needed to continue the conversation.",
+                    },
+                    {
+                        "role": "user",
+                        "content": orjson.dumps(conversation[:split], default=_model_dump).decode(),
+                    },
+                ],
+                **parameters,
+            )
+        if isinstance(resp, CustomStreamWrapper):
+            raise Exception("unexpected response type of CustomStreamWrapper")
+        choice_resp = resp.choices[-1]
+        if isinstance(choice_resp, StreamingChoices) or choice_resp.message.content is None:
+            raise Exception("unexpected summary response")
+        summary = {
+            "role": "user",
+            "content": f"Summary of the conversation so far: {choice_resp.message.content}",
+        }
+        return [*prefix, summary, *conversation[split:]]
 
     async def _invoke_llm(
-        self, messages: list[dict[str, str] | Message], tool_defs: list[dict[str, Any]]
-    ):
+        self,
+        messages: list[dict[str, Any] | Message],
+        tool_defs: list[dict[str, Any]],
+        on_token: Callable[[str], None] | None = None,
+    ) -> ModelResponse:
+        from litellm import CustomStreamWrapper
+        from litellm.types.utils import Usage  # pyright: ignore[reportMissingTypeStubs]
+
         with trace.get_tracer("redpanda.agent").start_as_current_span("invoke_llm") as span:
             span.set_attribute("model", self.model)
-            span.set_attribute(
-                "messages",
-                json.dumps([m.model_dump() if isinstance(m, BaseModel) else m for m in messages]),
-            )
-            resp = await acompletion(
-                model=self.model,
-                response_format=self.response_format,
-                messages=messages,
-                tools=tool_defs,
-                **self.parameters,
-            )
-            if isinstance(resp, CustomStreamWrapper):
-                raise Exception("unexpected response type of CustomStreamWrapper")
+            # Serializing the conversation is expensive, so only do it when the span is exported.
+            if span.is_recording():
+                span.set_attribute("messages", orjson.dumps(messages, default=_model_dump).decode())
+            cache_key = None
+            if self.response_cache_size > 0:
+                cache_key = self._response_cache_key(messages, tool_defs)
+                cached = self._response_cache.get(cache_key) if cache_key else None
+                if cache_key and cached:
+                    self._response_cache.move_to_end(cache_key)
+                    span.set_attribute("cache_hit", True)
+                    resp = cached.model_copy(deep=True)
+                    if on_token is not None:
+                        _emit_content(resp, on_token)
+                    return resp
+            speculative = self.draft_model is not None and not tool_defs
+            if on_token is None and not speculative:
+                resp = await acompletion(
+                    model=self.model,
+                    response_format=self.response_format,
+                    messages=messages,
+                    tools=tool_defs,
+                    **self.parameters,
+                )
+                if isinstance(resp, CustomStreamWrapper):
+                    raise Exception("unexpected response type of CustomStreamWrapper")
+            else:
+                resp = await self._stream_llm(messages, tool_defs, on_token or _discard)
             if hasattr(resp, "usage") and isinstance(resp.usage, Usage):  # pyright: ignore[reportAttributeAccessIssue,reportUnknownMemberType]
                 usage = resp.usage  # pyright: ignore[reportAttributeAccessIssue]
                 span.set_attribute("completion_tokens", usage.completion_tokens)
@@ -243,20 +560,148 @@ class Agent:
                     ptd = usage.prompt_tokens_details
                     if ptd.cached_tokens:
                         span.set_attribute("cached_tokens", ptd.cached_tokens)
-            span.set_attribute("response", json.dumps([m.model_dump() for m in resp.choices]))
+            if span.is_recording():
+                span.set_attribute(
+                    "response", orjson.dumps(resp.choices, default=_model_dump).decode()
+                )
+            if cache_key:
+                self._response_cache[cache_key] = resp.model_copy(deep=True)
+                while len(self._response_cache) > self.response_cache_size:
+                    self._response_cache.popitem(last=False)
             return resp
 
+    async def _stream_llm(
+        self,
+        messages: list[dict[str, Any] | Message],
+        tool_defs: list[dict[str, Any]],
+        on_token: Callable[[str], None],
+    ) -> ModelResponse:
+        from litellm import stream_chunk_builder
+        from litellm.types.utils import ModelResponse  # pyright: ignore[reportMissingTypeStubs]
+
+        if self.draft_model is not None and not tool_defs:
+            stream, chunks = await self._race_first_token(messages, self.draft_model)
+        else:
+            stream, chunks = await self._first_token(
+                self.model, messages, tool_defs, self.parameters
+            )
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                on_token(chunk.choices[0].delta.content)
+        async for chunk in stream:
+            chunks.append(chunk)
+            if chunk.choices and chunk.choices[0].delta.content:
+                on_token(chunk.choices[0].delta.content)
+        # Tool calls are only acted upon once the full response has been received.
+        resp = stream_chunk_builder(chunks, messages=messages)
+        if not isinstance(resp, ModelResponse):
+            raise Exception(f"unexpected response type of {type(resp).__name__}")
+        return resp
+
+    async def _first_token(
+        self,
+        model: str,
+        messages: list[dict[str, Any] | Message],
+        tool_defs: list[dict[str, Any]],
+        parameters: dict[str, Any],
+    ) -> tuple[CustomStreamWrapper, list[Any]]:
+        """
+        Start streaming a completion and read it up to the first content token.
+        """
+        from litellm import CustomStreamWrapper
+
+        stream = await acompletion(
+            model=model,
+            response_format=self.response_format,
+            messages=messages,
+            tools=tool_defs,
+            stream=True,
+            **parameters,
+        )
+        if not isinstance(stream, CustomStreamWrapper):
+            raise Exception(f"unexpected response type of {type(stream).__name__}")
+        chunks: list[Any] = []
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    break
+        except BaseException:
+            # Including cancellation when this model lost the race against the draft model.
+            await _close_stream(stream)
+            raise
+        return stream, chunks
+
+    async def _race_first_token(
+        self,
+        messages: list[dict[str, Any] | Message],
+        draft_model: str,
+    ) -> tuple[CustomStreamWrapper, list[Any]]:
+        """
+        Race the agent's model against the draft model and keep the first to produce a token.
+        """
+        main = asyncio.create_task(self._first_token(self.model, messages, [], self.parameters))
+        # The agent's parameters (such as its API key or base) are meant for the agent's model.
+        draft = asyncio.create_task(self._first_token(draft_model, messages, [], {}))
+        pending = {main, draft}
+        winner = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # The agent's model is preferred when both are ready at the same time.
+                for task, model in ((main, self.model), (draft, draft_model)):
+                    if task in done and task.exception() is None:
+                        trace.get_current_span().set_attribute("model", model)
+                        winner = task
+                        return task.result()
+            # Both models failed, surface the error of the agent's model.
+            return main.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            # The other model may have produced its first token too, its stream is not read.
+            for task in (main, draft):
+                done_ok = task.done() and not task.cancelled() and task.exception() is None
+                if task is not winner and done_ok:
+                    await _close_stream(task.result()[0])
+
+    def _response_cache_key(
+        self, messages: list[dict[str, Any] | Message], tool_defs: list[dict[str, Any]]
+    ) -> str | None:
+        request = {
+            "model": self.model,
+            "parameters": self.parameters,
+            "response_format": self._response_schema,
+        }
+        key = hashlib.blake2b()
+        try:
+            key.update(orjson.dumps(request, option=orjson.OPT_SORT_KEYS))
+            # The tools and system prompt are the same for every turn, so reuse their encoding.
+            if tool_defs is self._tool_defs_cache and self._tool_defs_bytes is not None:
+                key.update(self._tool_defs_bytes)
+            else:
+                key.update(orjson.dumps(tool_defs, option=orjson.OPT_SORT_KEYS))
+            if messages and messages[0] is self._system_message:
+                key.update(self._system_bytes)
+                messages = messages[1:]
+            key.update(orjson.dumps(messages, default=_model_dump, option=orjson.OPT_SORT_KEYS))
+        except TypeError:
+            # Requests we cannot reliably identify are not cached.
+            return None
+        return key.hexdigest()
+
     async def _call_tools(
         self, tool_calls: list[ChatCompletionMessageToolCall], tools: dict[str, Tool]
     ) -> list[dict[str, Any]]:
-        messages: list[dict[str, Any]] = []
-        for tool_call in tool_calls:
+        async def run_one(tool_call: ChatCompletionMessageToolCall) -> dict[str, Any]:
             func = tool_call.function
             selected = func.name and tools.get(func.name)
             if not selected:
                 raise Exception(f"tool {func.name} not found")
             await self.hooks.on_tool_start(self, selected, func.arguments)
-            resp = await selected(json.loads(func.arguments))
+            # The arguments are parsed once here, tools receive the parsed dict.
+            args = orjson.loads(func.arguments)
+            resp = await selected(args)
             if isinstance(resp, ToolResponse):
                 output: Any = []
                 for content in resp.content:
@@ -278,31 +723,122 @@ class Agent:
                         )
                     else:
                         raise NotImplementedError(f"Unknown content type: {content.type}")
-            if isinstance(resp, BaseModel):
-                output = resp.model_dump_json()
+            elif isinstance(resp, BaseModel):
+                output = resp.__pydantic_serializer__.to_json(resp).decode()
             else:
-                output = json.dumps(resp)
+                output = _tool_result_json(resp)
             await self.hooks.on_tool_end(
-                self, selected, output if isinstance(output, str) else json.dumps(output)
-            )
-            messages.append(
-                {
-                    "tool_call_id": tool_call.id,
-                    "role": "tool",
-                    "name": selected.name,
-                    "content": output,
-                }
+                self, selected, output if isinstance(output, str) else _tool_result_json(output)
             )
-        return messages
+            return {
+                "tool_call_id": tool_call.id,
+                "role": "tool",
+                "name": selected.name,
+                "content": output,
+            }
+
+        # Tool calls within a single turn are independent, so dispatch them concurrently.
+        # gather preserves the input order, keeping the tool messages aligned with the calls.
+        return list(await asyncio.gather(*(run_one(tool_call) for tool_call in tool_calls)))
 
-    def as_tool(self) -> Tool:
+    def as_tool(self, batched: bool = False) -> Tool:
+        """
+        Expose this agent as a tool to other agents.
+
+        Args:
+            batched: Accept a list of inputs and run the agent on all of them concurrently.
+        """
         # TODO(rockwood): support handoffs and passing more context
-        return AgentTool(self)
+        return AgentTool(self, batched=batched)
+
+
+def _model_dump(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _tool_result_json(result: Any) -> str:
+    # Results can contain models, for example from a batched agent with a response type.
+    try:
+        return orjson.dumps(result, default=_model_dump, option=orjson.OPT_NON_STR_KEYS).decode()
+    except orjson.JSONEncodeError:
+        # orjson rejects integers wider than 64 bits, which the json module supports.
+        return json.dumps(result, default=_model_dump)
+
+
+def _discard(token: str) -> None:
+    pass
+
+
+def _emit_content(resp: ModelResponse, on_token: Callable[[str], None]) -> None:
+    from litellm.types.utils import StreamingChoices  # pyright: ignore[reportMissingTypeStubs]
+
+    choice = resp.choices[-1]
+    if not isinstance(choice, StreamingChoices) and choice.message.content:
+        on_token(choice.message.content)
+
+
+async def _close_stream(stream: CustomStreamWrapper) -> None:
+    """
+    Release the connection of a stream that is not read to the end.
+    """
+    inner = stream.completion_stream
+    close = getattr(inner, "aclose", None) or getattr(inner, "close", None)
+    if close is None:
+        return
+    with suppress(Exception):
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+
+
+def _role(message: dict[str, Any] | Message) -> str:
+    return message["role"] if isinstance(message, dict) else message.role
+
+
+def _merge_tools(
+    tools: dict[str, Tool],
+    server_tools: Iterable[tuple[MCPEndpoint, list[Tool]]],
+    reported: set[tuple[str, str]],
+) -> None:
+    """
+    Add the tools of each MCP server, in order, to `tools`. Conflicts are resolved in favor of
+    the tools that were added first, and logged once for each server and tool in `reported`.
+    """
+    for server, tool_list in server_tools:
+        for tool in tool_list:
+            if tools.setdefault(tool.name, tool) is tool:
+                continue
+            conflict = (str(server), tool.name)
+            if conflict not in reported:
+                reported.add(conflict)
+                _logger.warning("tool conflict: %s from MCP server %s", tool.name, server)
+
+
+def _tool_defs(tools: dict[str, Tool]) -> list[dict[str, Any]]:
+    # Sorted so that the tools are presented to the model in a stable order between runs.
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": tool.parameters,
+            },
+        }
+        for _, tool in sorted(tools.items())
+    ]
 
 
 class AgentTool(Tool):
     """
     A tool that wraps an agent and allows it to be called another agent.
+
+    The wrapped agent may run several times concurrently, either because the calling agent
+    requested multiple calls in the same turn or because the tool is batched. This is safe as
+    each run keeps its conversation to itself and only shares the agent's connections and
+    caches, so custom tools and hooks of the wrapped agent must be reentrant too.
     """
 
     agent: Agent
@@ -313,14 +849,33 @@ class AgentTool(Tool):
     class Input(BaseModel):
         input: str
 
-    def __init__(self, agent: Agent):
-        super().__init__(
-            name=agent.name,
-            description=f"An agent called {agent.name} you can pass text to and get a response.",
-            parameters=AgentTool.Input.model_json_schema(),
-        )
+    class BatchInput(BaseModel):
+        inputs: list[str]
+
+    _INPUT_SCHEMA: dict[str, Any] = Input.model_json_schema()
+    _BATCH_INPUT_SCHEMA: dict[str, Any] = BatchInput.model_json_schema()
+
+    batched: bool
+    """
+    Whether the tool accepts a list of inputs that are run concurrently.
+    """
+
+    def __init__(self, agent: Agent, batched: bool = False):
+        if batched:
+            description = (
+                f"An agent called {agent.name} you can pass a list of independent texts to "
+                + "and get a list of responses, one per text."
+            )
+            parameters = AgentTool._BATCH_INPUT_SCHEMA
+        else:
+            description = f"An agent called {agent.name} you can pass text to and get a response."
+            parameters = AgentTool._INPUT_SCHEMA
+        super().__init__(name=agent.name, description=description, parameters=parameters)
         self.agent = agent
+        self.batched = batched
 
     @override
     async def __call__(self, args: dict[str, Any]) -> Any:
+        if self.batched:
+            return await asyncio.gather(*(self.agent.run(input) for input in args["inputs"]))
         return await self.agent.run(args["input"])
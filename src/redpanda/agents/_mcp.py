@@ -12,11 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
+import asyncio
+import contextvars
+import hashlib
+import os
+import shlex
+import tempfile
+import time
 from contextlib import asynccontextmanager
 from datetime import timedelta
+from pathlib import Path
 from typing import Any, override
 
+import httpx
+import orjson
 from mcp import ClientSession, Tool as MCPToolDef
 from mcp.client.sse import sse_client
 from mcp.client.stdio import StdioServerParameters, stdio_client
@@ -24,9 +33,40 @@ from mcp.client.streamable_http import streamablehttp_client
 from mcp.client.websocket import websocket_client
 from mcp.shared.exceptions import McpError
 from opentelemetry import trace
+from pydantic import TypeAdapter, ValidationError
 
 from ._tools import Tool, ToolResponse, ToolResponseImageContent, ToolResponseTextContent
 
+_tool_list_adapter = TypeAdapter(list[MCPToolDef])
+
+_tracer = trace.get_tracer("redpanda.mcp")
+
+# Streamable HTTP sends every message as its own request, so keep enough idle connections
+# around (and for long enough) that a busy session does not redo the TCP and TLS handshakes.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60)
+
+
+def _keepalive_http_client(
+    headers: dict[str, str] | None = None,
+    timeout: httpx.Timeout | None = None,
+    auth: httpx.Auth | None = None,
+) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout or httpx.Timeout(30.0),
+        auth=auth,
+        follow_redirects=True,
+        limits=_HTTP_LIMITS,
+    )
+
+
+def _tracing_enabled() -> bool:
+    """
+    Whether a tracer provider has been configured, otherwise spans would never be exported.
+    """
+    provider = trace.get_tracer_provider()
+    return not isinstance(provider, trace.ProxyTracerProvider | trace.NoOpTracerProvider)
+
 
 class MCPEndpoint:
     """
@@ -35,10 +75,68 @@ class MCPEndpoint:
 
     # TODO(rockwood): support list change notifications
     _cache_enabled: bool
+    _cache_dir: Path | None
+    _cache_ttl: timedelta
     _cached_tool_list: list[MCPToolDef] | None = None
+    _persistent: bool = True
+    """
+    Whether an agent may keep its connection to this endpoint open across runs. Endpoints
+    that need a fresh connection for each run (i.e. per request headers) should disable this.
+    """
 
-    def __init__(self, cache_enabled: bool) -> None:
+    def __init__(
+        self,
+        cache_enabled: bool,
+        cache_dir: Path | None = None,
+        cache_ttl: timedelta = timedelta(hours=1),
+    ) -> None:
         self._cache_enabled = cache_enabled
+        self._cache_dir = cache_dir
+        self._cache_ttl = cache_ttl
+
+    def _identity(self) -> bytes:
+        """
+        A unique identifier of the server this endpoint connects to.
+        """
+        raise NotImplementedError()
+
+    def _cache_path(self) -> Path | None:
+        if not self._cache_enabled or self._cache_dir is None:
+            return None
+        key = hashlib.blake2b(self._identity(), digest_size=16).hexdigest()
+        return self._cache_dir / f"{key}.json"
+
+    def _load_cached_tool_list(self) -> list[MCPToolDef] | None:
+        """
+        Load the list of tools persisted by a previous process, if it's not expired.
+        """
+        path = self._cache_path()
+        if path is None:
+            return None
+        try:
+            if time.time() - path.stat().st_mtime > self._cache_ttl.total_seconds():
+                return None
+            return _tool_list_adapter.validate_json(path.read_bytes())
+        except (OSError, ValidationError):
+            return None
+
+    def _store_cached_tool_list(self, tools: list[MCPToolDef]) -> None:
+        path = self._cache_path()
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so that concurrent readers never see a partial file.
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(_tool_list_adapter.dump_json(tools, by_alias=True, exclude_none=True))
+                os.replace(tmp, path)
+            except OSError:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            pass
 
 
 class StdioMCPEndpoint(MCPEndpoint):
@@ -48,17 +146,34 @@ class StdioMCPEndpoint(MCPEndpoint):
 
     params: StdioServerParameters
 
-    def __init__(self, params: StdioServerParameters, cache_enabled: bool = True):
+    def __init__(
+        self,
+        params: StdioServerParameters,
+        cache_enabled: bool = True,
+        cache_dir: Path | None = None,
+        cache_ttl: timedelta = timedelta(hours=1),
+    ):
         """
         Create a new StdioMCPEndpoint instance.
 
         Args:
             params: The parameters for the server.
             cache_enabled: Whether to cache the list of {tools,resources,prompts} from the server.
+            cache_dir: An optional directory where the cached list of tools is persisted, so
+                that it can be reused by later processes. Only cached in memory when None.
+            cache_ttl: How long the list of tools persisted in `cache_dir` is reused for.
         """
-        super().__init__(cache_enabled)
+        super().__init__(cache_enabled, cache_dir, cache_ttl)
         self.params = params
 
+    @override
+    def _identity(self) -> bytes:
+        return b"stdio:" + self.params.model_dump_json().encode()
+
+    @override
+    def __str__(self) -> str:
+        return shlex.join([self.params.command, *self.params.args])
+
 
 class SSEMCPEndpoint(MCPEndpoint):
     """
@@ -67,17 +182,34 @@ class SSEMCPEndpoint(MCPEndpoint):
 
     url: str
 
-    def __init__(self, url: str, cache_enabled: bool = True):
+    def __init__(
+        self,
+        url: str,
+        cache_enabled: bool = True,
+        cache_dir: Path | None = None,
+        cache_ttl: timedelta = timedelta(hours=1),
+    ):
         """
         Create a new SSEMCPEndpoint instance.
 
         Args:
             url: The URL of the SSE server.
             cache_enabled: Whether to cache the list of {tools,resources,prompts} from the server.
+            cache_dir: An optional directory where the cached list of tools is persisted, so
+                that it can be reused by later processes. Only cached in memory when None.
+            cache_ttl: How long the list of tools persisted in `cache_dir` is reused for.
         """
-        super().__init__(cache_enabled)
+        super().__init__(cache_enabled, cache_dir, cache_ttl)
         self.url = url
 
+    @override
+    def _identity(self) -> bytes:
+        return b"sse:" + self.url.encode()
+
+    @override
+    def __str__(self) -> str:
+        return self.url
+
     @property
     def headers(self) -> dict[str, Any]:
         return {}
@@ -90,36 +222,73 @@ class WebsocketMCPEndpoint(MCPEndpoint):
 
     url: str
 
-    def __init__(self, url: str, cache_enabled: bool = True):
+    def __init__(
+        self,
+        url: str,
+        cache_enabled: bool = True,
+        cache_dir: Path | None = None,
+        cache_ttl: timedelta = timedelta(hours=1),
+    ):
         """
         Create a new WebsocketMCPEndpoint instance.
 
         Args:
             url: The URL of the WebSocket server.
             cache_enabled: Whether to cache the list of {tools,resources,prompts} from the server.
+            cache_dir: An optional directory where the cached list of tools is persisted, so
+                that it can be reused by later processes. Only cached in memory when None.
+            cache_ttl: How long the list of tools persisted in `cache_dir` is reused for.
         """
-        super().__init__(cache_enabled)
+        super().__init__(cache_enabled, cache_dir, cache_ttl)
         self.url = url
 
+    @override
+    def _identity(self) -> bytes:
+        return b"ws:" + self.url.encode()
+
+    @override
+    def __str__(self) -> str:
+        return self.url
+
 
 class StreamableHTTPMCPEndpoint(MCPEndpoint):
     """
     A MCP endpoint that communicates with an MCP server over HTTP streaming.
+
+    The HTTP connections are kept alive and reused for the lifetime of the MCP connection,
+    which is shared between runs of the agent.
     """
 
     url: str
 
-    def __init__(self, url: str, cache_enabled: bool = True):
+    def __init__(
+        self,
+        url: str,
+        cache_enabled: bool = True,
+        cache_dir: Path | None = None,
+        cache_ttl: timedelta = timedelta(hours=1),
+    ):
         """
         Create a new StreamableHTTPMCPEndpoint instance.
 
         Args:
             url: The URL of the HTTP server.
             cache_enabled: Whether to cache the list of {tools,resources,prompts} from the server.
+            cache_dir: An optional directory where the cached list of tools is persisted, so
+                that it can be reused by later processes. Only cached in memory when None.
+            cache_ttl: How long the list of tools persisted in `cache_dir` is reused for.
         """
-        super().__init__(cache_enabled)
+        super().__init__(cache_enabled, cache_dir, cache_ttl)
         self.url = url
 
+    @override
+    def _identity(self) -> bytes:
+        return b"http:" + self.url.encode()
+
+    @override
+    def __str__(self) -> str:
+        return self.url
+
     @property
     def headers(self) -> dict[str, Any]:
         return {}
@@ -144,7 +313,10 @@ async def mcp_client(server: MCPEndpoint):
                 yield MCPClient(server, client)
     elif isinstance(server, StreamableHTTPMCPEndpoint):
         async with streamablehttp_client(
-            server.url, server.headers, timeout=timedelta(seconds=30)
+            server.url,
+            server.headers,
+            timeout=timedelta(seconds=30),
+            httpx_client_factory=_keepalive_http_client,
         ) as (read, write, _get_session_id):
             async with ClientSession(read, write) as client:
                 yield MCPClient(server, client)
@@ -152,6 +324,118 @@ async def mcp_client(server: MCPEndpoint):
         raise NotImplementedError(f"Unknown server type: {server}")
 
 
+class MCPClientGroup:
+    """
+    A group of initialized MCP clients, connected concurrently.
+
+    Each client is opened, held and closed by its own task in a task group, as the underlying
+    transports are bound to the task that opened them. This allows the group to be opened and
+    closed from different tasks.
+    """
+
+    clients: list["MCPClient"]
+    _task: "asyncio.Task[None] | None"
+    _closing: asyncio.Event
+
+    def __init__(
+        self,
+        clients: list["MCPClient"],
+        task: "asyncio.Task[None] | None",
+        closing: asyncio.Event,
+    ):
+        self.clients = clients
+        self._task = task
+        self._closing = closing
+
+    @classmethod
+    async def open(
+        cls, servers: list[MCPEndpoint], context: contextvars.Context | None = None
+    ) -> "MCPClientGroup":
+        """
+        Connect to and initialize all the given servers.
+
+        Args:
+            servers: The servers to connect to.
+            context: The context the connections are held in, defaults to a copy of the
+                current context. Groups that outlive the caller should be given their own
+                context, so that they don't keep (and add spans to) the caller's trace.
+        """
+        closing = asyncio.Event()
+        if not servers:
+            return cls([], None, closing)
+        ready = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(_hold_mcp_clients(servers, ready, closing), context=context)
+        try:
+            clients = await asyncio.shield(ready)
+        except BaseException:
+            closing.set()
+            await asyncio.gather(task, return_exceptions=True)
+            raise
+        return cls(clients, task, closing)
+
+    @property
+    def lost(self) -> bool:
+        """
+        Whether the connections have been lost.
+        """
+        return self._task is not None and self._task.done()
+
+    async def aclose(self) -> None:
+        """
+        Close all the clients in the group.
+        """
+        task = self._task
+        if task is None:
+            return
+        if task.done():
+            # The connections were already lost, there is nothing left to close.
+            _ = task.cancelled() or task.exception()
+            return
+        self._closing.set()
+        await task
+
+    async def __aenter__(self) -> "MCPClientGroup":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+
+async def _hold_mcp_clients(
+    servers: list[MCPEndpoint],
+    ready: "asyncio.Future[list[MCPClient]]",
+    closing: asyncio.Event,
+) -> None:
+    loop = asyncio.get_running_loop()
+    opened: list[asyncio.Future[MCPClient]] = [loop.create_future() for _ in servers]
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for server, client in zip(servers, opened, strict=True):
+                tg.create_task(_hold_mcp_client(server, client, closing))
+            ready.set_result(list(await asyncio.gather(*opened)))
+    except BaseException as e:
+        if ready.done():
+            raise
+        if isinstance(e, BaseExceptionGroup) and len(e.exceptions) == 1:
+            # Don't expose the task group to callers when a single connection failed.
+            ready.set_exception(e.exceptions[0])
+        else:
+            ready.set_exception(e)
+        if not isinstance(e, Exception):
+            raise
+
+
+async def _hold_mcp_client(
+    server: MCPEndpoint,
+    opened: "asyncio.Future[MCPClient]",
+    closing: asyncio.Event,
+) -> None:
+    async with mcp_client(server) as client:
+        await client.initialize()
+        opened.set_result(client)
+        await closing.wait()
+
+
 class MCPClient:
     """
     A wrapper around an MCP client session.
@@ -168,8 +452,11 @@ class MCPClient:
         await self._session.initialize()
 
     async def list_tools(self) -> list[Tool]:
-        if self._server._cache_enabled and self._server._cached_tool_list:
-            return [MCPTool(self, t) for t in self._server._cached_tool_list]
+        if self._server._cache_enabled:
+            if not self._server._cached_tool_list:
+                self._server._cached_tool_list = self._server._load_cached_tool_list()
+            if self._server._cached_tool_list:
+                return [MCPTool(self, t) for t in self._server._cached_tool_list]
         try:
             result = await self._session.list_tools()
         except McpError as e:
@@ -179,6 +466,7 @@ class MCPClient:
         tools = result.tools
         if self._server._cache_enabled:
             self._server._cached_tool_list = tools
+            self._server._store_cached_tool_list(tools)
         return [MCPTool(self, t) for t in tools]
 
     async def call_tool(self, tool: str, args: dict[str, Any]) -> Any:
@@ -215,7 +503,10 @@ class MCPTool(Tool):
 
     @override
     async def __call__(self, args: dict[str, Any]) -> Any:
-        with trace.get_tracer("redpanda.mcp").start_as_current_span("tool_call") as span:
+        if not _tracing_enabled():
+            return await self._client.call_tool(self.name, args)
+        with _tracer.start_as_current_span("tool_call") as span:
             span.set_attribute("name", self.name)
-            span.set_attribute("arguments", json.dumps(args))
+            if span.is_recording():
+                span.set_attribute("arguments", orjson.dumps(args).decode())
             return await self._client.call_tool(self.name, args)
@@ -51,7 +51,10 @@ class Tool:
         - Pydantic model, which will be serialized to JSON and passed back to the model as text.
         - string, which will be passed back to the model as text.
         - ToolResponse, which allows for more structured content to be passed back to the model.
-        - Anything else will be serialized using `json.dumps` and passed back to the model as text.
+        - Anything else will be serialized to JSON and passed back to the model as text.
+
+        When the model requests multiple tools in a single turn they are invoked concurrently,
+        so implementations must be safe to call concurrently.
         """
         raise NotImplementedError()
 
@@ -17,18 +17,19 @@ from typing import Any, final, override
 
 from opentelemetry import trace
 from opentelemetry.sdk import trace as tracesdk
-from opentelemetry.sdk.trace.export import SimpleSpanProcessor
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 
 from redpanda.agents import Agent, SSEMCPEndpoint
 
 from ._grpc import RuntimeServer, serve_main
-from ._otel import PassthroughTraceCollector
+from ._otel import PassthroughSpanProcessor
 
 
 @final
 class _TracingSSEMCPEndpoint(SSEMCPEndpoint):
     _propagator = TraceContextTextMapPropagator()
+    # The trace context is injected when connecting, so each run needs its own connection.
+    _persistent = False
 
     @property
     @override
@@ -42,19 +43,21 @@ async def serve(agent: Agent) -> None:
     """
     Serve an agent as a Redpanda Connect processor plugin.
 
-    This method runs for the entire lifetime of the server.
+    This method runs for the entire lifetime of the server. It is served from the running
+    event loop, so to use uvloop start the program with `uvloop.run` instead of `asyncio.run`.
 
     Args:
         agent: The agent to serve.
     """
     provider = tracesdk.TracerProvider()
     trace.set_tracer_provider(provider)
-    provider.add_span_processor(SimpleSpanProcessor(PassthroughTraceCollector()))
+    provider.add_span_processor(PassthroughSpanProcessor())
     addr = os.getenv("REDPANDA_CONNECT_AGENT_RUNTIME_MCP_SERVER")
     if addr:
         agent.mcp.append(_TracingSSEMCPEndpoint(addr))
     server = RuntimeServer(agent, trace.get_tracer("redpanda.runtime"))
-    await serve_main(server)
+    async with agent:
+        await serve_main(server)
 
 
 __all__ = ["serve"]
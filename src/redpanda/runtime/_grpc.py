@@ -15,11 +15,16 @@
 import asyncio
 import base64
 import json
+import os
 import signal
-from typing import override
+import socket
+import threading
+from collections.abc import AsyncIterator, Callable
+from typing import Any, override
 
 import grpc  # pyright: ignore[reportMissingTypeStubs]
 import grpc.aio  # pyright: ignore[reportMissingTypeStubs]
+import orjson
 from grpc_health.v1 import health_pb2, health_pb2_grpc  # pyright: ignore[reportMissingTypeStubs]
 from grpc_health.v1.health import HealthServicer  # pyright: ignore[reportMissingTypeStubs]
 from opentelemetry import trace
@@ -36,48 +41,51 @@ from redpanda.runtime.v1alpha1 import (
 from ._otel import convert_spans, current_spans_context_var
 
 
-def _serialize_payload(payload: msg_pb.Value) -> str:
+def _to_py(payload: msg_pb.Value) -> Any:
     kind = payload.WhichOneof("kind")
-    if kind == "bool_value":
-        return "true" if payload.bool_value else "false"
-    elif kind == "bytes_value":
-        return base64.standard_b64encode(payload.bytes_value).decode("hex")
-    elif kind == "double_value":
-        return str(payload.double_value)
-    elif kind == "integer_value":
-        return str(payload.integer_value)
-    elif kind == "list_value":
-        return (
-            "[" + ",".join([_serialize_payload(item) for item in payload.list_value.values]) + "]"
-        )
-    elif kind == "null_value":
-        return "null"
-    elif kind == "string_value":
-        return json.dumps(payload.string_value)
-    elif kind == "struct_value":
-        return (
-            "{"
-            + ",".join(
-                [
-                    json.dumps(k) + ":" + _serialize_payload(v)
-                    for k, v in payload.struct_value.fields.items()
-                ]
-            )
-            + "}"
-        )
-    elif kind == "timestamp_value":
-        return json.dumps(payload.timestamp_value.ToJsonString())
-    else:
-        raise ValueError(f"Unknown payload kind: {kind}")
+    try:
+        handler = _KIND_HANDLERS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown payload kind: {kind}") from None
+    return handler(payload)
+
+
+_KIND_HANDLERS: dict[str | None, Callable[[msg_pb.Value], Any]] = {
+    "bool_value": lambda p: p.bool_value,
+    "bytes_value": lambda p: base64.standard_b64encode(p.bytes_value).decode("ascii"),
+    "double_value": lambda p: p.double_value,
+    "integer_value": lambda p: p.integer_value,
+    "list_value": lambda p: [_to_py(item) for item in p.list_value.values],
+    "null_value": lambda p: None,
+    "string_value": lambda p: p.string_value,
+    "struct_value": lambda p: {k: _to_py(v) for k, v in p.struct_value.fields.items()},
+    "timestamp_value": lambda p: p.timestamp_value.ToJsonString(),
+}
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _output_json(output: Any) -> bytes:
+    try:
+        return orjson.dumps(output, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        # orjson rejects integers wider than 64 bits, which the json module supports.
+        return json.dumps(output, default=_json_default).encode("utf-8")
 
 
 class RuntimeServer(grpcpb.AgentRuntimeServicer):
     agent: Agent
     tracer: trace.Tracer
+    max_inflight: int
 
-    def __init__(self, agent: Agent, tracer: trace.Tracer):
+    def __init__(self, agent: Agent, tracer: trace.Tracer, max_inflight: int = 64):
         self.agent = agent
         self.tracer = tracer
+        self.max_inflight = max_inflight
 
     @override
     async def InvokeAgent(
@@ -85,51 +93,189 @@ class RuntimeServer(grpcpb.AgentRuntimeServicer):
         request: pb.InvokeAgentRequest,
         context: grpc.aio.ServicerContext[pb.InvokeAgentResponse, pb.InvokeAgentResponse],
     ) -> pb.InvokeAgentResponse:
+        try:
+            return await self._invoke(request)
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            raise
+
+    @override
+    async def InvokeAgentStream(
+        self,
+        request_iterator: AsyncIterator[pb.InvokeAgentRequest],
+        context: grpc.aio.ServicerContext[pb.InvokeAgentRequest, pb.InvokeAgentResponse],
+    ) -> AsyncIterator[pb.InvokeAgentResponse]:
+        # Bounds the number of concurrent runs, so a fast caller cannot queue unlimited work.
+        inflight = asyncio.Semaphore(self.max_inflight)
+        responses: asyncio.Queue[pb.InvokeAgentResponse | None] = asyncio.Queue()
+
+        async def handle(request: pb.InvokeAgentRequest) -> None:
+            try:
+                response = await self._invoke(request)
+            except Exception as e:
+                response = pb.InvokeAgentResponse(
+                    message=msg_pb.Message(
+                        metadata=request.message.metadata,
+                        error=msg_pb.Error(message=str(e)),
+                    ),
+                )
+            finally:
+                inflight.release()
+            response.sequence = request.sequence
+            responses.put_nowait(response)
+
+        async def read() -> None:
+            async with asyncio.TaskGroup() as tg:
+                async for request in request_iterator:
+                    await inflight.acquire()
+                    tg.create_task(handle(request))
+
+        reader = asyncio.create_task(read())
+        reader.add_done_callback(lambda _: responses.put_nowait(None))
+        try:
+            while (response := await responses.get()) is not None:
+                yield response
+            await reader
+        finally:
+            reader.cancel()
+
+    async def _invoke(self, request: pb.InvokeAgentRequest) -> pb.InvokeAgentResponse:
         trace_ctx = None
         if request.HasField("trace_context"):
+            tc = request.trace_context
             span_context = trace.SpanContext(
-                trace_id=int(request.trace_context.trace_id, 16),
-                span_id=int(request.trace_context.span_id, 16),
+                trace_id=int(tc.trace_id, 16),
+                span_id=int(tc.span_id, 16),
                 is_remote=True,
-                trace_flags=trace.TraceFlags(int(request.trace_context.trace_flags, 16)),
+                trace_flags=trace.TraceFlags(int(tc.trace_flags, 16)),
             )
             trace_ctx = trace.set_span_in_context(trace.NonRecordingSpan(span_context))
         spans: list[tracesdk.ReadableSpan] = []
-        token = current_spans_context_var.set(spans)
+        # Spans are only sent back to callers that passed a trace context, so there is no need
+        # to collect them otherwise. A context variable (and not a thread local) is required to
+        # keep the spans of concurrent requests apart.
+        token = current_spans_context_var.set(spans) if trace_ctx else None
         try:
-            payload: str
-            if request.message.WhichOneof("payload") == "structured":
-                payload = _serialize_payload(request.message.structured)
+            # Payloads are handed to the agent as is (bytes or Python objects), so agents that
+            # override `run` do not have to decode or parse them again.
+            msg = request.message
+            payload: Any
+            if msg.WhichOneof("payload") == "structured":
+                payload = _to_py(msg.structured)
             else:
-                payload = request.message.bytes.decode("utf-8")
+                payload = msg.bytes
             with self.tracer.start_as_current_span("agent_invoke", context=trace_ctx):
                 output = await self.agent.run(input=payload)
-            if isinstance(output, BaseModel):
-                output = output.model_dump_json()
-            elif not isinstance(output, str):
-                output = json.dumps(output)
-            return pb.InvokeAgentResponse(
-                message=msg_pb.Message(
-                    bytes=output.encode("utf-8"),
-                    metadata=request.message.metadata,
-                ),
-                trace=pb.Trace(spans=convert_spans(spans)) if trace_ctx else None,
-            )
-        except Exception as e:
-            context.set_code(grpc.StatusCode.INTERNAL)
-            context.set_details(str(e))
-            raise
+            data: bytes
+            if isinstance(output, str):
+                data = output.encode("utf-8")
+            elif isinstance(output, bytes | bytearray):
+                data = bytes(output)
+            elif isinstance(output, BaseModel):
+                data = output.__pydantic_serializer__.to_json(output)
+            else:
+                data = _output_json(output)
+            # Fill in the response in place instead of copying nested messages into it.
+            response = pb.InvokeAgentResponse()
+            out = response.message
+            out.bytes = data
+            out.metadata.MergeFrom(msg.metadata)
+            if trace_ctx:
+                response.trace.spans.extend(convert_spans(spans))
+            return response
         finally:
-            current_spans_context_var.reset(token)
+            if token is not None:
+                current_spans_context_var.reset(token)
+
+
+_SERVER_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30_000),
+    ("grpc.max_concurrent_streams", 1024),
+]
 
 
 async def serve_main(runtime_server: RuntimeServer):
+    workers = int(os.getenv("RP_RUNTIME_WORKERS", "1"))
+    if workers <= 1:
+        await _serve(runtime_server, port=0, reuse_port=False, primary=True)
+        return
+    # gRPC servers do not survive a fork, so reserve the port and fork the workers before any
+    # server is created. Every worker then binds the same port and the kernel balances
+    # incoming connections between them.
+    # Redpanda Connect only manages the primary process. The workers hold the read end of a pipe
+    # that only the primary can write to, which is closed when the primary exits for any reason
+    # (including SIGKILL), so the workers can stop with it.
+    alive_r, alive_w = os.pipe()
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        children = [
+            _fork_worker(runtime_server, port, alive_r, alive_w) for _ in range(workers - 1)
+        ]
+        os.close(alive_r)
+        try:
+            await _serve(runtime_server, port=port, reuse_port=True, primary=True)
+        finally:
+            for pid in children:
+                os.kill(pid, signal.SIGTERM)
+            for pid in children:
+                os.waitpid(pid, 0)
+            os.close(alive_w)
+
+
+def _fork_worker(runtime_server: RuntimeServer, port: int, alive_r: int, alive_w: int) -> int:
+    pid = os.fork()
+    if pid != 0:
+        return pid
+    # The child is still inside the parent's running event loop, so serve from a new loop in a
+    # separate thread and never return to the parent's code.
+    try:
+        # The handlers of the parent's loop would only wake up that loop, which no longer runs.
+        signal.set_wakeup_fd(-1)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_DFL)
+        os.close(alive_w)
+        thread = threading.Thread(
+            target=asyncio.run,
+            args=(
+                _serve(
+                    runtime_server, port=port, reuse_port=True, primary=False, parent_fd=alive_r
+                ),
+            ),
+            kwargs={"loop_factory": _new_event_loop},
+        )
+        thread.start()
+        thread.join()
+    finally:
+        os._exit(0)
+
+
+def _new_event_loop() -> asyncio.AbstractEventLoop:
+    # The workers own their event loop, so they can use uvloop when it is installed.
+    try:
+        import uvloop  # pyright: ignore[reportMissingImports]
+    except ImportError:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()  # pyright: ignore[reportUnknownMemberType,reportUnknownVariableType]
+
+
+async def _serve(
+    runtime_server: RuntimeServer,
+    port: int,
+    reuse_port: bool,
+    primary: bool,
+    parent_fd: int | None = None,
+):
+    loop = asyncio.get_running_loop()
     health = HealthServicer()
     health.set(  # pyright: ignore[reportUnknownMemberType]
         "plugin",
         health_pb2.HealthCheckResponse.ServingStatus.Value("SERVING"),
     )
-    server = grpc.aio.server()
+    options = [*_SERVER_OPTIONS, ("grpc.so_reuseport", 1)] if reuse_port else _SERVER_OPTIONS
+    server = grpc.aio.server(options=options)
     grpcpb.add_AgentRuntimeServicer_to_server(
         runtime_server,
         server,
@@ -138,18 +284,29 @@ async def serve_main(runtime_server: RuntimeServer):
         health,
         server,
     )
-    port = server.add_insecure_port("127.0.0.1:0")
-    print(f"1|1|tcp|127.0.0.1:{port}|grpc", flush=True)
+    port = server.add_insecure_port(f"127.0.0.1:{port}")
+    # Only the process that was started by Redpanda Connect reports the address.
+    if primary:
+        print(f"1|1|tcp|127.0.0.1:{port}|grpc", flush=True)
     await server.start()
 
     async def stop(sig: int):
         await server.stop(grace=None)
         loop.remove_signal_handler(sig)
 
+    def parent_exited(fd: int):
+        # Nothing is ever written to the pipe, it is only readable (at EOF) once it is closed.
+        loop.remove_reader(fd)
+        loop.create_task(server.stop(grace=None))
+
     try:
-        loop = asyncio.get_event_loop()
-        for sig in (signal.SIGINT, signal.SIGTERM):
-            loop.add_signal_handler(sig, lambda sig: asyncio.ensure_future(stop(sig)), sig)
+        # Workers serve from a separate thread where signal handlers cannot be installed, they
+        # are stopped by the primary process instead, or when it exits.
+        if primary:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, lambda sig: loop.create_task(stop(sig)), sig)
+        if parent_fd is not None:
+            loop.add_reader(parent_fd, parent_exited, parent_fd)
         await server.wait_for_termination()
     finally:
         await server.stop(grace=None)
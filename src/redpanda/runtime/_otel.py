@@ -14,23 +14,22 @@
 
 import contextvars
 import json
-from collections.abc import Sequence
 from typing import override
 
-from google.protobuf.timestamp_pb2 import Timestamp as PbTimestamp
 from opentelemetry import trace
 from opentelemetry.sdk import trace as tracesdk
-from opentelemetry.sdk.trace import export as traceexport
 from opentelemetry.util import types as oteltypes
 
 from redpanda.runtime.v1alpha1 import agent_pb2 as pb, message_pb2 as msg_pb
 
-
-def _proto_timestamp_from_time_ns(time_ns: int | None) -> PbTimestamp:
-    ts = PbTimestamp()
-    if time_ns is not None:
-        ts.FromNanoseconds(time_ns)
-    return ts
+# The Value field for each attribute type, anything else (sequences) is serialized to JSON.
+# Exact types are looked up first, subclasses (such as enums) fall back to isinstance checks.
+_ATTRIBUTE_FIELDS: dict[type, str] = {
+    str: "string_value",
+    bool: "bool_value",
+    int: "integer_value",
+    float: "double_value",
+}
 
 
 def _convert_span_attributes(attrs: oteltypes.Attributes) -> dict[str, msg_pb.Value]:
@@ -39,7 +38,10 @@ def _convert_span_attributes(attrs: oteltypes.Attributes) -> dict[str, msg_pb.Va
     pb_attrs: dict[str, msg_pb.Value] = {}
     for k, v in attrs.items():
         pb_v = msg_pb.Value()
-        if isinstance(v, str):
+        field = _ATTRIBUTE_FIELDS.get(type(v))
+        if field is not None:
+            setattr(pb_v, field, v)
+        elif isinstance(v, str):
             pb_v.string_value = v
         elif isinstance(v, bool):
             pb_v.bool_value = v
@@ -56,13 +58,17 @@ def _convert_span_attributes(attrs: oteltypes.Attributes) -> dict[str, msg_pb.Va
 def _convert_span(span: tracesdk.ReadableSpan) -> pb.Span | None:
     if span.context is None:
         return None
-    return pb.Span(
+    pb_span = pb.Span(
         span_id=trace.format_span_id(span.context.span_id),
         name=span.name,
-        start_time=_proto_timestamp_from_time_ns(span.start_time),
-        end_time=_proto_timestamp_from_time_ns(span.end_time),
         attributes=_convert_span_attributes(span.attributes),
     )
+    # Timestamps are left unset rather than zero when the span has no time.
+    if span.start_time is not None:
+        pb_span.start_time.FromNanoseconds(span.start_time)
+    if span.end_time is not None:
+        pb_span.end_time.FromNanoseconds(span.end_time)
+    return pb_span
 
 
 def convert_spans(spans: list[tracesdk.ReadableSpan]) -> list[pb.Span]:
@@ -75,31 +81,35 @@ def convert_spans(spans: list[tracesdk.ReadableSpan]) -> list[pb.Span]:
         parent = span.parent
         if parent is None or parent.is_remote:
             roots.append(span)
-            continue
-        children = by_parent_id.get(parent.span_id, [])
-        children.append(span)
-        by_parent_id[parent.span_id] = children
-
-    def convert_children(span: trace.SpanContext | None) -> list[pb.Span]:
-        if span is None:
-            return []
-        pb_children: list[pb.Span] = []
-        for child in by_parent_id.get(span.span_id, []):
-            pb_child = _convert_span(child)
-            if pb_child is None:
-                continue
-            pb_child.child_spans.extend(convert_children(child.context))
-            pb_children.append(pb_child)
-        return pb_children
-
-    pb_spans: list[pb.Span] = []
-    for span in roots:
+        else:
+            by_parent_id.setdefault(parent.span_id, []).append(span)
+
+    # Convert the spans reachable from the roots, parents before their children.
+    pb_by_id: dict[int, pb.Span] = {}
+    order: list[int] = []
+    stack = list(roots)
+    while stack:
+        span = stack.pop()
         pb_span = _convert_span(span)
-        if pb_span is None:
+        if span.context is None or pb_span is None:
             continue
-        pb_span.child_spans.extend(convert_children(span.context))
-        pb_spans.append(pb_span)
-    return pb_spans
+        pb_by_id[span.context.span_id] = pb_span
+        order.append(span.context.span_id)
+        stack.extend(by_parent_id.get(span.context.span_id, ()))
+
+    # Protobuf copies a span when it is added to its parent, so spans are assembled bottom up
+    # to only copy spans that already have all of their children.
+    for span_id in reversed(order):
+        pb_by_id[span_id].child_spans.extend(
+            pb_by_id[child.context.span_id]
+            for child in by_parent_id.get(span_id, ())
+            if child.context is not None and child.context.span_id in pb_by_id
+        )
+    return [
+        pb_by_id[span.context.span_id]
+        for span in roots
+        if span.context is not None and span.context.span_id in pb_by_id
+    ]
 
 
 current_spans_context_var = contextvars.ContextVar[list[tracesdk.ReadableSpan] | None](
@@ -110,25 +120,14 @@ A passthrough mechanism to collect spans for a single caller.
 """
 
 
-class PassthroughTraceCollector(traceexport.SpanExporter):
+class PassthroughSpanProcessor(tracesdk.SpanProcessor):
     """
-    PassthroughSpanExporter is a no-op span exporter that collects spans
-    by passing them to another context variable.
-
-    Must be used with SimpleSpanProcessor.
+    PassthroughSpanProcessor collects finished spans by appending them to the list in
+    `current_spans_context_var`, without going through an exporter.
     """
 
     @override
-    def export(self, spans: Sequence[tracesdk.ReadableSpan]) -> traceexport.SpanExportResult:
+    def on_end(self, span: tracesdk.ReadableSpan) -> None:
         s = current_spans_context_var.get()
-        if s is not None:
-            s.extend(spans)
-        return traceexport.SpanExportResult.SUCCESS
-
-    @override
-    def shutdown(self) -> None:
-        pass
-
-    @override
-    def force_flush(self, timeout_millis: int = 30000) -> bool:
-        return True
+        if s is not None and span.context is not None and span.context.trace_flags.sampled:
+            s.append(span)
@@ -26,7 +26,7 @@ from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__
 from redpanda.runtime.v1alpha1 import message_pb2 as redpanda_dot_runtime_dot_v1alpha1_dot_message__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n%redpanda/runtime/v1alpha1/agent.proto\x12\x19redpanda.runtime.v1alpha1\x1a\x1fgoogle/protobuf/timestamp.proto\x1a\'redpanda/runtime/v1alpha1/message.proto\"F\n\x0cTraceContext\x12\x10\n\x08trace_id\x18\x01 \x01(\t\x12\x0f\n\x07span_id\x18\x02 \x01(\t\x12\x13\n\x0btrace_flags\x18\x04 \x01(\t\"7\n\x05Trace\x12.\n\x05spans\x18\x01 \x03(\x0b\x32\x1f.redpanda.runtime.v1alpha1.Span\"\xd3\x02\n\x04Span\x12\x0f\n\x07span_id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12.\n\nstart_time\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12,\n\x08\x65nd_time\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x43\n\nattributes\x18\x05 \x03(\x0b\x32/.redpanda.runtime.v1alpha1.Span.AttributesEntry\x12\x34\n\x0b\x63hild_spans\x18\x06 \x03(\x0b\x32\x1f.redpanda.runtime.v1alpha1.Span\x1aS\n\x0f\x41ttributesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12/\n\x05value\x18\x02 \x01(\x0b\x32 .redpanda.runtime.v1alpha1.Value:\x02\x38\x01\"\x89\x01\n\x12InvokeAgentRequest\x12\x33\n\x07message\x18\x01 \x01(\x0b\x32\".redpanda.runtime.v1alpha1.Message\x12>\n\rtrace_context\x18\x02 \x01(\x0b\x32\'.redpanda.runtime.v1alpha1.TraceContext\"{\n\x13InvokeAgentResponse\x12\x33\n\x07message\x18\x01 \x01(\x0b\x32\".redpanda.runtime.v1alpha1.Message\x12/\n\x05trace\x18\x02 \x01(\x0b\x32 .redpanda.runtime.v1alpha1.Trace2|\n\x0c\x41gentRuntime\x12l\n\x0bInvokeAgent\x12-.redpanda.runtime.v1alpha1.InvokeAgentRequest\x1a..redpanda.runtime.v1alpha1.InvokeAgentResponseB>Z<github.com/redpanda-data/connect/v4/internal/agent/runtimepbb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n%redpanda/runtime/v1alpha1/agent.proto\x12\x19redpanda.runtime.v1alpha1\x1a\x1fgoogle/protobuf/timestamp.proto\x1a\'redpanda/runtime/v1alpha1/message.proto\"F\n\x0cTraceContext\x12\x10\n\x08trace_id\x18\x01 \x01(\t\x12\x0f\n\x07span_id\x18\x02 \x01(\t\x12\x13\n\x0btrace_flags\x18\x04 \x01(\t\"7\n\x05Trace\x12.\n\x05spans\x18\x01 \x03(\x0b\x32\x1f.redpanda.runtime.v1alpha1.Span\"\xd3\x02\n\x04Span\x12\x0f\n\x07span_id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12.\n\nstart_time\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12,\n\x08\x65nd_time\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x43\n\nattributes\x18\x05 \x03(\x0b\x32/.redpanda.runtime.v1alpha1.Span.AttributesEntry\x12\x34\n\x0b\x63hild_spans\x18\x06 \x03(\x0b\x32\x1f.redpanda.runtime.v1alpha1.Span\x1aS\n\x0f\x41ttributesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12/\n\x05value\x18\x02 \x01(\x0b\x32 .redpanda.runtime.v1alpha1.Value:\x02\x38\x01\"\x9b\x01\n\x12InvokeAgentRequest\x12\x33\n\x07message\x18\x01 \x01(\x0b\x32\".redpanda.runtime.v1alpha1.Message\x12>\n\rtrace_context\x18\x02 \x01(\x0b\x32\'.redpanda.runtime.v1alpha1.TraceContext\x12\x10\n\x08sequence\x18\x03 \x01(\x04\"\x8d\x01\n\x13InvokeAgentResponse\x12\x33\n\x07message\x18\x01 \x01(\x0b\x32\".redpanda.runtime.v1alpha1.Message\x12/\n\x05trace\x18\x02 \x01(\x0b\x32 .redpanda.runtime.v1alpha1.Trace\x12\x10\n\x08sequence\x18\x03 \x01(\x04\x32\xf4\x01\n\x0c\x41gentRuntime\x12l\n\x0bInvokeAgent\x12-.redpanda.runtime.v1alpha1.InvokeAgentRequest\x1a..redpanda.runtime.v1alpha1.InvokeAgentResponse\x12v\n\x11InvokeAgentStream\x12-.redpanda.runtime.v1alpha1.InvokeAgentRequest\x1a..redpanda.runtime.v1alpha1.InvokeAgentResponse(\x01\x30\x01\x42>Z<github.com/redpanda-data/connect/v4/internal/agent/runtimepbb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -45,9 +45,9 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_SPAN_ATTRIBUTESENTRY']._serialized_start=528
   _globals['_SPAN_ATTRIBUTESENTRY']._serialized_end=611
   _globals['_INVOKEAGENTREQUEST']._serialized_start=614
-  _globals['_INVOKEAGENTREQUEST']._serialized_end=751
-  _globals['_INVOKEAGENTRESPONSE']._serialized_start=753
-  _globals['_INVOKEAGENTRESPONSE']._serialized_end=876
-  _globals['_AGENTRUNTIME']._serialized_start=878
-  _globals['_AGENTRUNTIME']._serialized_end=1002
+  _globals['_INVOKEAGENTREQUEST']._serialized_end=769
+  _globals['_INVOKEAGENTRESPONSE']._serialized_start=772
+  _globals['_INVOKEAGENTRESPONSE']._serialized_end=913
+  _globals['_AGENTRUNTIME']._serialized_start=916
+  _globals['_AGENTRUNTIME']._serialized_end=1160
 # @@protoc_insertion_point(module_scope)
@@ -125,6 +125,11 @@ class InvokeAgentRequest(google.protobuf.message.Message):
 
     MESSAGE_FIELD_NUMBER: builtins.int
     TRACE_CONTEXT_FIELD_NUMBER: builtins.int
+    SEQUENCE_FIELD_NUMBER: builtins.int
+    sequence: builtins.int
+    """An identifier chosen by the caller of `InvokeAgentStream` that is echoed
+    back in the corresponding response, as responses can be sent out of order.
+    """
     @property
     def message(self) -> redpanda.runtime.v1alpha1.message_pb2.Message: ...
     @property
@@ -134,9 +139,10 @@ class InvokeAgentRequest(google.protobuf.message.Message):
         *,
         message: redpanda.runtime.v1alpha1.message_pb2.Message | None = ...,
         trace_context: global___TraceContext | None = ...,
+        sequence: builtins.int = ...,
     ) -> None: ...
     def HasField(self, field_name: typing.Literal["message", b"message", "trace_context", b"trace_context"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["message", b"message", "trace_context", b"trace_context"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["message", b"message", "sequence", b"sequence", "trace_context", b"trace_context"]) -> None: ...
 
 global___InvokeAgentRequest = InvokeAgentRequest
 
@@ -148,6 +154,9 @@ class InvokeAgentResponse(google.protobuf.message.Message):
 
     MESSAGE_FIELD_NUMBER: builtins.int
     TRACE_FIELD_NUMBER: builtins.int
+    SEQUENCE_FIELD_NUMBER: builtins.int
+    sequence: builtins.int
+    """The sequence of the request that this is the response to."""
     @property
     def message(self) -> redpanda.runtime.v1alpha1.message_pb2.Message: ...
     @property
@@ -157,8 +166,9 @@ class InvokeAgentResponse(google.protobuf.message.Message):
         *,
         message: redpanda.runtime.v1alpha1.message_pb2.Message | None = ...,
         trace: global___Trace | None = ...,
+        sequence: builtins.int = ...,
     ) -> None: ...
     def HasField(self, field_name: typing.Literal["message", b"message", "trace", b"trace"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["message", b"message", "trace", b"trace"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["message", b"message", "sequence", b"sequence", "trace", b"trace"]) -> None: ...
 
 global___InvokeAgentResponse = InvokeAgentResponse
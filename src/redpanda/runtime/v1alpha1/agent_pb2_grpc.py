@@ -40,6 +40,11 @@ class AgentRuntimeStub(object):
                 request_serializer=redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentRequest.SerializeToString,
                 response_deserializer=redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentResponse.FromString,
                 _registered_method=True)
+        self.InvokeAgentStream = channel.stream_stream(
+                '/redpanda.runtime.v1alpha1.AgentRuntime/InvokeAgentStream',
+                request_serializer=redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentRequest.SerializeToString,
+                response_deserializer=redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentResponse.FromString,
+                _registered_method=True)
 
 
 class AgentRuntimeServicer(object):
@@ -52,6 +57,16 @@ class AgentRuntimeServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def InvokeAgentStream(self, request_iterator, context):
+        """Invoke the agent for each request on the stream. Requests are processed
+        concurrently and responses are sent as soon as they complete, so they may
+        be in a different order than the requests. Failures are reported through
+        the error of the response message instead of ending the stream.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_AgentRuntimeServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -60,6 +75,11 @@ def add_AgentRuntimeServicer_to_server(servicer, server):
                     request_deserializer=redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentRequest.FromString,
                     response_serializer=redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentResponse.SerializeToString,
             ),
+            'InvokeAgentStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.InvokeAgentStream,
+                    request_deserializer=redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentRequest.FromString,
+                    response_serializer=redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'redpanda.runtime.v1alpha1.AgentRuntime', rpc_method_handlers)
@@ -98,3 +118,30 @@ class AgentRuntime(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def InvokeAgentStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/redpanda.runtime.v1alpha1.AgentRuntime/InvokeAgentStream',
+            redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentRequest.SerializeToString,
+            redpanda_dot_runtime_dot_v1alpha1_dot_agent__pb2.InvokeAgentResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
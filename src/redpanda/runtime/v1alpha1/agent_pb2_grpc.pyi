@@ -39,6 +39,16 @@ class AgentRuntimeStub:
         redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentResponse,
     ]
 
+    InvokeAgentStream: grpc.StreamStreamMultiCallable[
+        redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentRequest,
+        redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentResponse,
+    ]
+    """Invoke the agent for each request on the stream. Requests are processed
+    concurrently and responses are sent as soon as they complete, so they may
+    be in a different order than the requests. Failures are reported through
+    the error of the response message instead of ending the stream.
+    """
+
 class AgentRuntimeAsyncStub:
     """`AgentRuntime` is the service that provides the ability to invoke an agent."""
 
@@ -47,6 +57,16 @@ class AgentRuntimeAsyncStub:
         redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentResponse,
     ]
 
+    InvokeAgentStream: grpc.aio.StreamStreamMultiCallable[
+        redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentRequest,
+        redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentResponse,
+    ]
+    """Invoke the agent for each request on the stream. Requests are processed
+    concurrently and responses are sent as soon as they complete, so they may
+    be in a different order than the requests. Failures are reported through
+    the error of the response message instead of ending the stream.
+    """
+
 class AgentRuntimeServicer(metaclass=abc.ABCMeta):
     """`AgentRuntime` is the service that provides the ability to invoke an agent."""
 
@@ -57,4 +77,16 @@ class AgentRuntimeServicer(metaclass=abc.ABCMeta):
         context: _ServicerContext,
     ) -> typing.Union[redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentResponse, collections.abc.Awaitable[redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentResponse]]: ...
 
+    @abc.abstractmethod
+    def InvokeAgentStream(
+        self,
+        request_iterator: _MaybeAsyncIterator[redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentRequest],
+        context: _ServicerContext,
+    ) -> typing.Union[collections.abc.Iterator[redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentResponse], collections.abc.AsyncIterator[redpanda.runtime.v1alpha1.agent_pb2.InvokeAgentResponse]]:
+        """Invoke the agent for each request on the stream. Requests are processed
+        concurrently and responses are sent as soon as they complete, so they may
+        be in a different order than the requests. Failures are reported through
+        the error of the response message instead of ending the stream.
+        """
+
 def add_AgentRuntimeServicer_to_server(servicer: AgentRuntimeServicer, server: typing.Union[grpc.Server, grpc.aio.Server]) -> None: ...
@@ -1,9 +1,23 @@
+import asyncio
+import contextvars
+import json
 import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
 
+import litellm
 import pytest
+from litellm.types.utils import ChatCompletionMessageToolCall, Function, ModelResponse
+from mcp import StdioServerParameters
 from pydantic import BaseModel
 
 from redpanda import agents
+from redpanda.agents import _agent
+from redpanda.agents._tools import ToolResponse, ToolResponseImageContent, ToolResponseTextContent
 
 
 class MyModel(BaseModel):
@@ -23,3 +37,316 @@ async def test_llm_prompt():
     )
     resp = await my_agent.run(input="In one word what color is the sky?")
     assert resp.color in ["blue", "azure"], f"expected color to be blue or azure, got: {resp.color}"
+
+
+class SleepyTool(agents.Tool):
+    def __init__(self, name: str):
+        super().__init__(name=name, description=None, parameters={})
+
+    async def __call__(self, args: dict[str, Any]) -> Any:
+        await asyncio.sleep(args["delay"])
+        return self.name
+
+
+async def test_tool_calls_run_concurrently():
+    tools: dict[str, agents.Tool] = {name: SleepyTool(name) for name in ["a", "b", "c"]}
+    my_agent = agents.Agent(name="Tools", model="openai/gpt-4o", tools=list(tools.values()))
+    tool_calls = [
+        ChatCompletionMessageToolCall(
+            id=str(i), function=Function(name=name, arguments=json.dumps({"delay": 0.2}))
+        )
+        for i, name in enumerate(tools)
+    ]
+    start = time.monotonic()
+    messages = await my_agent._call_tools(tool_calls, tools)  # pyright: ignore[reportPrivateUsage]
+    assert time.monotonic() - start < 0.5
+    assert [m["tool_call_id"] for m in messages] == ["0", "1", "2"]
+    assert [m["content"] for m in messages] == ['"a"', '"b"', '"c"']
+
+
+MCP_SERVER = """
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("test")
+
+
+@mcp.tool()
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+mcp.run()
+"""
+
+
+request_var = contextvars.ContextVar[str]("request")
+
+
+async def test_mcp_clients_are_reused(tmp_path: Path):
+    endpoint = agents.StdioMCPEndpoint(
+        StdioServerParameters(command=sys.executable, args=["-c", MCP_SERVER]), cache_dir=tmp_path
+    )
+    my_agent = agents.Agent(name="MCP", model="openai/gpt-4o", mcp=[endpoint])
+    async with my_agent:
+        token = request_var.set("first run")
+        try:
+            tools, tool_defs = await my_agent._ensure_mcp_ready()  # pyright: ignore[reportPrivateUsage]
+        finally:
+            request_var.reset(token)
+        # The shared connections don't keep the context of the run that opened them.
+        pool = my_agent._mcp_pool  # pyright: ignore[reportPrivateUsage]
+        assert pool is not None and pool._task is not None  # pyright: ignore[reportPrivateUsage]
+        assert request_var not in pool._task.get_context()  # pyright: ignore[reportPrivateUsage]
+        cached_tools, cached_defs = await my_agent._ensure_mcp_ready()  # pyright: ignore[reportPrivateUsage]
+        assert cached_tools is tools and cached_defs is tool_defs
+        assert [d["function"]["name"] for d in tool_defs] == ["add"]
+        resp = await tools["add"]({"a": 1, "b": 2})
+        assert [c.data for c in resp.content] == ["3"]
+    assert my_agent._tools_cache is None  # pyright: ignore[reportPrivateUsage]
+    # The tool list is persisted for other processes to reuse.
+    restarted = agents.StdioMCPEndpoint(endpoint.params, cache_dir=tmp_path)
+    cached = restarted._load_cached_tool_list()  # pyright: ignore[reportPrivateUsage]
+    assert cached is not None and [t.name for t in cached] == ["add"]
+    expired = agents.StdioMCPEndpoint(endpoint.params, cache_dir=tmp_path, cache_ttl=timedelta(0))
+    assert expired._load_cached_tool_list() is None  # pyright: ignore[reportPrivateUsage]
+    # Only endpoints given a cache directory persist their tools.
+    assert agents.StdioMCPEndpoint(endpoint.params)._cache_path() is None  # pyright: ignore[reportPrivateUsage]
+
+
+def test_tool_conflicts_are_logged_once(caplog: pytest.LogCaptureFixture):
+    builtin = SleepyTool("a")
+    endpoint = agents.SSEMCPEndpoint("http://localhost:1234/sse")
+    reported: set[tuple[str, str]] = set()
+    for _ in range(2):
+        tools: dict[str, agents.Tool] = {"a": builtin}
+        _agent._merge_tools(tools, [(endpoint, [SleepyTool("a"), SleepyTool("b")])], reported)  # pyright: ignore[reportPrivateUsage]
+        assert tools["a"] is builtin and "b" in tools
+    assert [r.getMessage() for r in caplog.records] == [
+        "tool conflict: a from MCP server http://localhost:1234/sse"
+    ]
+    stdio = agents.StdioMCPEndpoint(StdioServerParameters(command="server", args=["--port", "1 2"]))
+    assert str(stdio) == "server --port '1 2'"
+
+
+async def test_response_cache(monkeypatch: pytest.MonkeyPatch):
+    calls: list[Any] = []
+
+    async def fake_acompletion(**kwargs: Any) -> ModelResponse:
+        calls.append(kwargs)
+        return ModelResponse(choices=[{"message": {"role": "assistant", "content": "blue"}}])
+
+    monkeypatch.setattr(_agent, "acompletion", fake_acompletion)
+    my_agent = agents.Agent(name="Cached", model="openai/gpt-4o", response_cache_size=1)
+    assert await my_agent.run("What color is the sky?") == "blue"
+    assert await my_agent.run("What color is the sky?") == "blue"
+    assert len(calls) == 1
+    await my_agent.run("What color is grass?")
+    await my_agent.run("What color is the sky?")
+    assert len(calls) == 3
+
+
+async def test_changes_after_first_run_are_used(monkeypatch: pytest.MonkeyPatch):
+    calls: list[Any] = []
+
+    async def fake_acompletion(**kwargs: Any) -> ModelResponse:
+        calls.append(kwargs)
+        content = '{"color": "blue"}'
+        return ModelResponse(choices=[{"message": {"role": "assistant", "content": content}}])
+
+    monkeypatch.setattr(_agent, "acompletion", fake_acompletion)
+    my_agent = agents.Agent(name="Changing", model="openai/gpt-4o")
+    assert await my_agent.run("What color is the sky?") == '{"color": "blue"}'
+    assert calls[-1]["tools"] == []
+    my_agent.instructions = "Answer in JSON."
+    my_agent.response_format = MyModel
+    my_agent.tools.append(SleepyTool("a"))
+    assert await my_agent.run("What color is the sky?") == MyModel(color="blue")
+    assert calls[-1]["messages"][0] == {"role": "system", "content": "Answer in JSON."}
+    assert calls[-1]["response_format"] is MyModel
+    assert [t["function"]["name"] for t in calls[-1]["tools"]] == ["a"]
+
+
+async def test_repeated_tool_calls_are_stopped(monkeypatch: pytest.MonkeyPatch):
+    async def fake_acompletion(**kwargs: Any) -> ModelResponse:
+        tool_call = {"id": "1", "function": {"name": "a", "arguments": '{"delay":0}'}}
+        message = {"role": "assistant", "content": None, "tool_calls": [tool_call]}
+        return ModelResponse(choices=[{"message": message}])
+
+    monkeypatch.setattr(_agent, "acompletion", fake_acompletion)
+    my_agent = agents.Agent(
+        name="Loopy", model="openai/gpt-4o", tools=[SleepyTool("a")], max_tool_repeats=2
+    )
+    with pytest.raises(Exception, match="more than 2 times"):
+        await my_agent.run("Go")
+
+
+async def test_run_stream():
+    my_agent = agents.Agent(
+        name="Streamer", model="openai/gpt-4o", mock_response="The sky is blue today"
+    )
+    tokens = [token async for token in my_agent.run_stream("What color is the sky?")]
+    assert len(tokens) > 1
+    assert "".join(tokens) == "The sky is blue today"
+
+
+async def test_draft_model_answers_first(monkeypatch: pytest.MonkeyPatch):
+    calls: list[dict[str, Any]] = []
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        calls.append(kwargs)
+        if kwargs["model"] == "openai/gpt-4o":
+            await asyncio.sleep(10)
+        kwargs.pop("api_key", None)
+        return await litellm.acompletion(**kwargs, mock_response=f"from {kwargs['model']}")
+
+    monkeypatch.setattr(_agent, "acompletion", fake_acompletion)
+    my_agent = agents.Agent(
+        name="Drafter", model="openai/gpt-4o", draft_model="openai/gpt-4o-mini", api_key="secret"
+    )
+    start = time.monotonic()
+    tokens = [token async for token in my_agent.run_stream("What color is the sky?")]
+    assert "".join(tokens) == "from openai/gpt-4o-mini"
+    assert await my_agent.run("What color is the sky?") == "from openai/gpt-4o-mini"
+    assert time.monotonic() - start < 5
+    # The agent's parameters (here its API key) are not sent to the draft model's provider.
+    assert {c["model"]: c.get("api_key") for c in calls} == {
+        "openai/gpt-4o": "secret",
+        "openai/gpt-4o-mini": None,
+    }
+
+
+class ClosableStream:
+    closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+async def test_draft_model_stream_is_closed_when_both_are_ready(monkeypatch: pytest.MonkeyPatch):
+    streams: dict[str, Any] = {}
+
+    async def fake_first_token(self: agents.Agent, model: str, *args: Any) -> Any:
+        # Only the wrapped stream is used to close a stream.
+        stream = streams[model] = SimpleNamespace(completion_stream=ClosableStream())
+        return stream, []
+
+    monkeypatch.setattr(agents.Agent, "_first_token", fake_first_token)
+    my_agent = agents.Agent(name="Drafter", model="openai/gpt-4o", draft_model="openai/gpt-4o-mini")
+    stream, _ = await my_agent._race_first_token([], "openai/gpt-4o-mini")  # pyright: ignore[reportPrivateUsage]
+    assert stream is streams["openai/gpt-4o"]
+    assert not streams["openai/gpt-4o"].completion_stream.closed
+    assert streams["openai/gpt-4o-mini"].completion_stream.closed
+
+
+async def test_batched_agent_tool(monkeypatch: pytest.MonkeyPatch):
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        await asyncio.sleep(0.5)
+        content = kwargs["messages"][-1]["content"].upper()
+        if kwargs["response_format"] is not None:
+            content = json.dumps({"color": content})
+        return await litellm.acompletion(**kwargs, mock_response=content)
+
+    monkeypatch.setattr(_agent, "acompletion", fake_acompletion)
+    tool = agents.Agent(name="Shouter", model="openai/gpt-4o").as_tool(batched=True)
+    assert tool.parameters["required"] == ["inputs"]
+    start = time.monotonic()
+    assert await tool({"inputs": ["a", "b", "c", "d"]}) == ["A", "B", "C", "D"]
+    assert time.monotonic() - start < 1.5
+
+    colors = agents.Agent(name="Colors", model="openai/gpt-4o", response_type=MyModel).as_tool(
+        batched=True
+    )
+    parent = agents.Agent(name="Parent", model="openai/gpt-4o", tools=[colors])
+    tool_call = ChatCompletionMessageToolCall(
+        id="1", function=Function(name="Colors", arguments='{"inputs": ["red", "blue"]}')
+    )
+    [message] = await parent._call_tools([tool_call], {"Colors": colors})  # pyright: ignore[reportPrivateUsage]
+    assert json.loads(message["content"]) == [{"color": "RED"}, {"color": "BLUE"}]
+
+
+async def test_structured_input(monkeypatch: pytest.MonkeyPatch):
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        return await litellm.acompletion(**kwargs, mock_response=kwargs["messages"][-1]["content"])
+
+    monkeypatch.setattr(_agent, "acompletion", fake_acompletion)
+    my_agent = agents.Agent(name="Echo", model="openai/gpt-4o")
+    output = await my_agent.run({"city": "Paris", "days": [1, 2]})
+    assert json.loads(output) == {"city": "Paris", "days": [1, 2]}
+    assert await my_agent.run("héllo".encode()) == "héllo"
+
+
+class DictTool(agents.Tool):
+    def __init__(self):
+        super().__init__(name="dict", description=None, parameters={})
+
+    async def __call__(self, args: dict[str, Any]) -> Any:
+        return {1: "x", "big": 2**70}
+
+
+async def test_tool_result_json():
+    tool = DictTool()
+    my_agent = agents.Agent(name="Dicts", model="openai/gpt-4o", tools=[tool])
+    tool_call = ChatCompletionMessageToolCall(
+        id="1", function=Function(name="dict", arguments="{}")
+    )
+    [message] = await my_agent._call_tools([tool_call], {"dict": tool})  # pyright: ignore[reportPrivateUsage]
+    assert json.loads(message["content"]) == {"1": "x", "big": 2**70}
+
+
+async def test_compact_history(monkeypatch: pytest.MonkeyPatch):
+    calls: list[dict[str, Any]] = []
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        calls.append(kwargs)
+        return await litellm.acompletion(**kwargs, mock_response="the weather is sunny")
+
+    monkeypatch.setattr(_agent, "acompletion", fake_acompletion)
+    my_agent = agents.Agent(
+        name="Forgetful", model="openai/gpt-4o", history_limit=4, api_key="secret"
+    )
+    tool_calls = [
+        {"id": str(i), "type": "function", "function": {"name": "weather", "arguments": "{}"}}
+        for i in range(2)
+    ]
+    messages: list[Any] = [
+        {"role": "user", "content": "What is the weather?"},
+        {"role": "assistant", "content": None, "tool_calls": tool_calls},
+        {"role": "tool", "tool_call_id": "0", "content": "sunny"},
+        {"role": "tool", "tool_call_id": "1", "content": "warm"},
+        {"role": "assistant", "content": "It is sunny and warm"},
+    ]
+    compacted = await my_agent._compact_history(messages, 4)  # pyright: ignore[reportPrivateUsage]
+    [summary_call] = calls
+    assert summary_call["model"] == "openai/gpt-4o"
+    assert summary_call["api_key"] == "secret"
+    # The tool results are summarized along with the assistant message that requested them.
+    summarized = json.loads(summary_call["messages"][-1]["content"])
+    assert [m["role"] for m in summarized] == ["user", "assistant", "tool", "tool"]
+    assert compacted[0]["content"] == "Summary of the conversation so far: the weather is sunny"
+    assert compacted[1:] == messages[4:]
+
+
+class ImageTool(agents.Tool):
+    def __init__(self):
+        super().__init__(name="image", description=None, parameters={})
+
+    async def __call__(self, args: dict[str, Any]) -> Any:
+        return ToolResponse(
+            content=[
+                ToolResponseTextContent(data="a cat"),
+                ToolResponseImageContent(data="Y2F0", mime_type="image/png"),
+            ]
+        )
+
+
+async def test_tool_response_content():
+    tool = ImageTool()
+    my_agent = agents.Agent(name="Images", model="openai/gpt-4o", tools=[tool])
+    tool_call = ChatCompletionMessageToolCall(
+        id="1", function=Function(name="image", arguments="{}")
+    )
+    [message] = await my_agent._call_tools([tool_call], {"image": tool})  # pyright: ignore[reportPrivateUsage]
+    assert message["content"] == [
+        {"type": "text", "text": "a cat"},
+        {"type": "image_url", "image_url": {"url": "data:image/png;base64,Y2F0"}},
+    ]
@@ -0,0 +1,323 @@
+import asyncio
+import enum
+import os
+import signal
+import socket
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, cast, override
+
+import grpc.aio  # pyright: ignore[reportMissingTypeStubs]
+import pytest
+from google.protobuf.timestamp_pb2 import Timestamp
+from opentelemetry import trace
+from opentelemetry.sdk import trace as tracesdk
+from opentelemetry.sdk.trace import sampling
+
+from redpanda import agents
+from redpanda.runtime._grpc import RuntimeServer, _output_json, _to_py
+from redpanda.runtime._otel import (
+    PassthroughSpanProcessor,
+    _convert_span,
+    _convert_span_attributes,
+    convert_spans,
+    current_spans_context_var,
+)
+from redpanda.runtime.v1alpha1 import (
+    agent_pb2 as pb,
+    agent_pb2_grpc as grpcpb,
+    message_pb2 as msg_pb,
+)
+
+if TYPE_CHECKING:
+    from redpanda.runtime.v1alpha1.agent_pb2_grpc import AgentRuntimeAsyncStub
+
+
+class SleepyAgent(agents.Agent):
+    """
+    An agent that sleeps for the number of seconds it is given and echoes them back.
+    """
+
+    inflight: int
+    max_inflight: int
+
+    def __init__(self):
+        super().__init__(name="Sleepy", model="openai/gpt-4o")
+        self.inflight = 0
+        self.max_inflight = 0
+
+    @override
+    async def run(self, input: str | Any) -> Any:
+        text = input.decode() if isinstance(input, bytes) else input
+        if text == "boom":
+            raise Exception("boom!")
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(float(text))
+        finally:
+            self.inflight -= 1
+        return text
+
+
+@asynccontextmanager
+async def runtime_stub(
+    agent: agents.Agent, max_inflight: int = 64
+) -> AsyncIterator["AgentRuntimeAsyncStub"]:
+    server = grpc.aio.server()
+    grpcpb.add_AgentRuntimeServicer_to_server(
+        RuntimeServer(agent, trace.get_tracer("test"), max_inflight=max_inflight), server
+    )
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            yield cast("AgentRuntimeAsyncStub", grpcpb.AgentRuntimeStub(channel))
+    finally:
+        await server.stop(grace=None)
+
+
+def request(sequence: int, text: str) -> pb.InvokeAgentRequest:
+    return pb.InvokeAgentRequest(sequence=sequence, message=msg_pb.Message(bytes=text.encode()))
+
+
+WORKERS_SERVER = """
+import asyncio
+import os
+
+from redpanda import agents
+from redpanda.runtime import serve
+
+
+class PidAgent(agents.Agent):
+    async def run(self, input):
+        return str(os.getpid())
+
+
+asyncio.run(serve(PidAgent(name="Pid", model="openai/gpt-4o")))
+"""
+
+
+def port_closed(port: int) -> bool:
+    try:
+        socket.create_connection(("127.0.0.1", port), timeout=1).close()
+    except ConnectionRefusedError:
+        return True
+    return False
+
+
+@pytest.mark.parametrize("sig", [signal.SIGTERM, signal.SIGKILL])
+async def test_workers_stop_with_the_primary(sig: signal.Signals):
+    env = {k: v for k, v in os.environ.items() if not k.startswith("REDPANDA_CONNECT_")}
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-c",
+        WORKERS_SERVER,
+        env={**env, "RP_RUNTIME_WORKERS": "3"},
+        stdout=asyncio.subprocess.PIPE,
+    )
+    try:
+        assert proc.stdout is not None
+        handshake = await asyncio.wait_for(proc.stdout.readline(), timeout=30)
+        port = int(handshake.decode().split("|")[3].rsplit(":", 1)[1])
+        # Each channel opens its own connection (instead of sharing one through the global
+        # subchannel pool), which the kernel hands to any of the workers that are listening.
+        options = [("grpc.use_local_subchannel_pool", 1)]
+        pids: set[bytes] = set()
+        for i in range(200):
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}", options=options) as channel:
+                stub = cast("AgentRuntimeAsyncStub", grpcpb.AgentRuntimeStub(channel))
+                resp = await stub.InvokeAgent(request(i, ""), timeout=10)
+                pids.add(resp.message.bytes)
+            if len(pids) > 1:
+                break
+        assert len(pids) > 1
+        proc.send_signal(sig)
+        await asyncio.wait_for(proc.wait(), timeout=10)
+        # The workers (which were not signaled) stop serving with the primary.
+        for _ in range(100):
+            if port_closed(port):
+                break
+            await asyncio.sleep(0.1)
+        assert port_closed(port)
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+
+async def test_stream_responds_out_of_order():
+    async with runtime_stub(SleepyAgent()) as stub:
+        requests = [request(10, "0.3"), request(11, "0.1"), request(12, "0.2")]
+        call = stub.InvokeAgentStream(iter(requests))
+        responses = [(r.sequence, r.message.bytes) async for r in call]
+    assert responses == [(11, b"0.1"), (12, b"0.2"), (10, b"0.3")]
+
+
+async def test_stream_reports_errors_per_request():
+    async with runtime_stub(SleepyAgent()) as stub:
+        call = stub.InvokeAgentStream()
+        await call.write(request(1, "boom"))
+        failed = await call.read()
+        assert isinstance(failed, pb.InvokeAgentResponse)
+        assert failed.sequence == 1
+        assert failed.message.error.message == "boom!"
+        # The stream stays open after a failed request.
+        await call.write(request(2, "0"))
+        succeeded = await call.read()
+        assert isinstance(succeeded, pb.InvokeAgentResponse)
+        assert succeeded.sequence == 2
+        assert succeeded.message.bytes == b"0"
+        assert not succeeded.message.HasField("error")
+        await call.done_writing()
+        assert await call.read() == grpc.aio.EOF  # pyright: ignore[reportAttributeAccessIssue]
+
+
+async def test_stream_bounds_inflight_requests():
+    agent = SleepyAgent()
+    async with runtime_stub(agent, max_inflight=2) as stub:
+        call = stub.InvokeAgentStream(iter([request(i, "0.1") for i in range(6)]))
+        responses = [r async for r in call]
+    assert sorted(r.sequence for r in responses) == list(range(6))
+    assert agent.max_inflight == 2
+
+
+def record_spans(sampler: sampling.Sampler = sampling.ALWAYS_ON) -> list[tracesdk.ReadableSpan]:
+    provider = tracesdk.TracerProvider(sampler=sampler)
+    provider.add_span_processor(PassthroughSpanProcessor())
+    tracer = provider.get_tracer("test")
+    spans: list[tracesdk.ReadableSpan] = []
+    token = current_spans_context_var.set(spans)
+    try:
+        with tracer.start_as_current_span("root", attributes={"n": 1, "ok": True}):
+            with tracer.start_as_current_span("a"):
+                with tracer.start_as_current_span("a1", attributes={"tags": ["x", "y"]}):
+                    pass
+                with tracer.start_as_current_span("a2"):
+                    pass
+            with tracer.start_as_current_span("b", attributes={"ratio": 0.5}):
+                pass
+        remote = trace.NonRecordingSpan(
+            trace.SpanContext(
+                trace_id=1, span_id=2, is_remote=True, trace_flags=trace.TraceFlags(1)
+            )
+        )
+        with tracer.start_as_current_span("other", context=trace.set_span_in_context(remote)):
+            pass
+    finally:
+        current_spans_context_var.reset(token)
+    return spans
+
+
+def shape(span: Any) -> tuple[str, list[Any]]:
+    return (span.name, [shape(child) for child in span.child_spans])
+
+
+def convert_spans_recursively(spans: list[tracesdk.ReadableSpan]) -> list[pb.Span]:
+    """
+    The straightforward recursive conversion, which convert_spans must match.
+    """
+
+    def convert(span: tracesdk.ReadableSpan) -> pb.Span:
+        pb_span = _convert_span(span)
+        assert pb_span is not None and span.context is not None
+        for child in spans:
+            if child.parent is not None and child.parent.span_id == span.context.span_id:
+                pb_span.child_spans.append(convert(child))
+        return pb_span
+
+    return [convert(s) for s in spans if s.parent is None or s.parent.is_remote]
+
+
+def test_convert_spans():
+    spans = record_spans()
+    converted = convert_spans(spans)
+    assert converted == convert_spans_recursively(spans)
+    assert [shape(s) for s in converted] == [
+        ("root", [("a", [("a1", []), ("a2", [])]), ("b", [])]),
+        ("other", []),
+    ]
+    # Every span is converted exactly once, with its own id, times and attributes.
+    by_name = {s.name: s for s in spans}
+    span_ids = {s.name: s.context.span_id for s in spans if s.context is not None}
+    root = converted[0]
+    assert root.span_id == trace.format_span_id(span_ids["root"])
+    assert root.start_time.ToNanoseconds() == by_name["root"].start_time
+    assert root.end_time.ToNanoseconds() == by_name["root"].end_time
+    assert root.attributes["n"].integer_value == 1
+    assert root.attributes["ok"].bool_value
+    a1 = root.child_spans[0].child_spans[0]
+    assert a1.span_id == trace.format_span_id(span_ids["a1"])
+    assert a1.attributes["tags"].string_value == '["x", "y"]'
+    assert root.child_spans[1].attributes["ratio"].double_value == 0.5
+
+
+class Color(enum.StrEnum):
+    BLUE = "blue"
+
+
+class Size(enum.IntEnum):
+    LARGE = 3
+
+
+def test_convert_span_attributes():
+    attrs = _convert_span_attributes(
+        {"color": Color.BLUE, "size": Size.LARGE, "ok": False, "n": 2, "tags": ("a",)}
+    )
+    assert attrs["color"] == msg_pb.Value(string_value="blue")
+    assert attrs["size"] == msg_pb.Value(integer_value=3)
+    assert attrs["ok"] == msg_pb.Value(bool_value=False)
+    assert attrs["n"] == msg_pb.Value(integer_value=2)
+    assert attrs["tags"] == msg_pb.Value(string_value='["a"]')
+
+
+def test_passthrough_span_processor_skips_unsampled_spans():
+    assert len(record_spans()) == 6
+    assert record_spans(sampling.StaticSampler(sampling.Decision.RECORD_ONLY)) == []
+    # Spans are not collected for callers that did not ask for them.
+    provider = tracesdk.TracerProvider()
+    provider.add_span_processor(PassthroughSpanProcessor())
+    with provider.get_tracer("test").start_as_current_span("ignored"):
+        pass
+    assert current_spans_context_var.get() is None
+
+
+def test_to_py():
+    ts = Timestamp()
+    ts.FromNanoseconds(1_500_000_000)
+    value = msg_pb.Value(
+        struct_value=msg_pb.StructValue(
+            fields={
+                "bool": msg_pb.Value(bool_value=True),
+                "bytes": msg_pb.Value(bytes_value=b"hi"),
+                "double": msg_pb.Value(double_value=1.5),
+                "int": msg_pb.Value(integer_value=-3),
+                "null": msg_pb.Value(null_value=msg_pb.NULL_VALUE),
+                "string": msg_pb.Value(string_value="s"),
+                "time": msg_pb.Value(timestamp_value=ts),
+                "list": msg_pb.Value(
+                    list_value=msg_pb.ListValue(
+                        values=[msg_pb.Value(integer_value=1), msg_pb.Value(string_value="2")]
+                    )
+                ),
+            }
+        )
+    )
+    assert _to_py(value) == {
+        "bool": True,
+        "bytes": "aGk=",
+        "double": 1.5,
+        "int": -3,
+        "null": None,
+        "string": "s",
+        "time": "1970-01-01T00:00:01.500Z",
+        "list": [1, "2"],
+    }
+    with pytest.raises(ValueError, match="Unknown payload kind"):
+        _to_py(msg_pb.Value())
+
+
+def test_output_json():
+    assert _output_json({1: [None, 2.5]}) == b'{"1":[null,2.5]}'
+    assert _output_json({"big": 2**70}) == b'{"big": 1180591620717411303424}'